@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -141,6 +142,10 @@ STATICFILES_DIRS = []
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Caching - using in-memory cache for development
+# Stock prices use a file-based cache shared by all worker processes on the
+# box, fronted by a small in-process LRU (see cards/price_cache.py).
+# Rendered dashboard fragments use their own shared file-based cache so a
+# write in one worker invalidates them for all (see cards/fragments.py).
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -148,9 +153,83 @@ CACHES = {
         'OPTIONS': {
             'MAX_ENTRIES': 1000
         }
+    },
+    'prices': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('PRICE_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'stock-cards-prices')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000
+        }
+    },
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('FRAGMENT_CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'stock-cards-fragments')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000
+        }
     }
 }
 
+FRAGMENT_CACHE_BACKEND = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+PRICE_CACHE_BACKEND = 'prices'
+PRICE_L1_MAX_ENTRIES = config('PRICE_L1_MAX_ENTRIES', default=1000, cast=int)
+PRICE_L1_TIMEOUT = config('PRICE_L1_TIMEOUT', default=30, cast=int)
+PRICE_L1_SYNC_INTERVAL = config('PRICE_L1_SYNC_INTERVAL', default=5, cast=int)
+
+# Stock price provider: 'yfinance' for live prices, 'replay' for recorded and
+# synthetic quotes from a local file (offline benchmarking / load testing),
+# or a dotted path to a cards.price_providers.PriceProvider subclass.
+PRICE_PROVIDER = config('PRICE_PROVIDER', default='yfinance')
+PRICE_PROVIDER_OPTIONS = {}
+
+if PRICE_PROVIDER == 'replay':
+    PRICE_PROVIDER_OPTIONS = {
+        'path': config('PRICE_REPLAY_FILE', default=str(BASE_DIR / 'cards' / 'data' / 'replay_quotes.json')),
+        'latency': config('PRICE_REPLAY_LATENCY', default=0.0, cast=float),
+        'jitter': config('PRICE_REPLAY_JITTER', default=0.0, cast=float),
+        'failure_rate': config('PRICE_REPLAY_FAILURE_RATE', default=0.0, cast=float),
+        'synthetic': config('PRICE_REPLAY_SYNTHETIC', default=True, cast=bool),
+    }
+
+# Stock price cache (stale-while-revalidate)
+# Prices younger than the soft timeout are served straight from the cache.
+# Older prices are still served until the hard timeout while a background
+# worker refreshes them, so page loads never wait on the price API.
+PRICE_CACHE_STALE_WHILE_REVALIDATE = config('PRICE_CACHE_STALE_WHILE_REVALIDATE', default=True, cast=bool)
+PRICE_CACHE_SOFT_TIMEOUT = config('PRICE_CACHE_SOFT_TIMEOUT', default=60 * 15, cast=int)
+PRICE_CACHE_HARD_TIMEOUT = config('PRICE_CACHE_HARD_TIMEOUT', default=60 * 60 * 4, cast=int)
+PRICE_REFRESH_WORKERS = config('PRICE_REFRESH_WORKERS', default=2, cast=int)
+
+# Tickers that fail pricing or validation are not retried for this long
+PRICE_NEGATIVE_CACHE_TIMEOUT = config('PRICE_NEGATIVE_CACHE_TIMEOUT', default=60 * 5, cast=int)
+
+# Concurrent cache misses for the same ticker share one fetch.
+# 'local' coalesces within a process; 'cache' also takes a lock in the shared
+# price cache so other worker processes wait for the same fetch.
+PRICE_FETCH_LOCK = config('PRICE_FETCH_LOCK', default='local')
+PRICE_FETCH_LOCK_TIMEOUT = config('PRICE_FETCH_LOCK_TIMEOUT', default=30, cast=int)
+
+# Price fetch methods are reordered by recent success rate and latency; a
+# method that fails this many times in a row is skipped for the cool-down.
+PRICE_METHOD_FAILURE_THRESHOLD = config('PRICE_METHOD_FAILURE_THRESHOLD', default=5, cast=int)
+PRICE_METHOD_COOLDOWN = config('PRICE_METHOD_COOLDOWN', default=300, cast=int)
+
+# Change-only price storage: a refreshed price within the relative tolerance
+# of the stock's last stored price and volume isn't written, except as a
+# heartbeat row once the last stored row is older than the heartbeat interval.
+# Stock.last_checked_at records every successful refresh either way.
+PRICE_SKIP_UNCHANGED = config('PRICE_SKIP_UNCHANGED', default=True, cast=bool)
+PRICE_UNCHANGED_TOLERANCE = config('PRICE_UNCHANGED_TOLERANCE', default=0.0001, cast=float)
+PRICE_HEARTBEAT_INTERVAL = config('PRICE_HEARTBEAT_INTERVAL', default=60 * 60 * 6, cast=int)
+
+# Price retention (see `manage.py compact_prices`): raw prices older than
+# PRICE_RAW_RETENTION_DAYS are rolled into daily bars, and daily bars older
+# than PRICE_DAILY_RETENTION_DAYS into weekly bars.
+PRICE_RAW_RETENTION_DAYS = config('PRICE_RAW_RETENTION_DAYS', default=14, cast=int)
+PRICE_DAILY_RETENTION_DAYS = config('PRICE_DAILY_RETENTION_DAYS', default=180, cast=int)
+
 # Email backend - console for development (prints to terminal)
 # For production/presentation, configure SMTP settings:
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -163,6 +242,26 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_HOST_USER = 'stockcards@localhost'
 DEFAULT_FROM_EMAIL = 'Stock Cards <stockcards@localhost>'
 
+# Outbox delivery (see `manage.py process_outbox` and cards.email_delivery):
+# messages are sent in batches of EMAIL_BATCH_SIZE over one reused backend
+# connection, on up to EMAIL_SEND_WORKERS concurrent connections, at no more
+# than EMAIL_RATE_LIMIT messages per second across all workers (0 = unlimited).
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=100, cast=int)
+EMAIL_SEND_WORKERS = config('EMAIL_SEND_WORKERS', default=1, cast=int)
+EMAIL_RATE_LIMIT = config('EMAIL_RATE_LIMIT', default=0.0, cast=float)
+
+# A message that fails to send is retried up to OUTBOX_MAX_ATTEMPTS times in
+# all, OUTBOX_RETRY_BACKOFF seconds after the first failure and twice as long
+# after each further one (at most OUTBOX_MAX_BACKOFF). A worker's claimed
+# messages are leased to it for OUTBOX_LEASE seconds, after which another
+# worker may pick them up. Sent messages are deleted after
+# OUTBOX_RETENTION_DAYS.
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+OUTBOX_RETRY_BACKOFF = config('OUTBOX_RETRY_BACKOFF', default=60, cast=int)
+OUTBOX_MAX_BACKOFF = config('OUTBOX_MAX_BACKOFF', default=60 * 60, cast=int)
+OUTBOX_LEASE = config('OUTBOX_LEASE', default=60 * 10, cast=int)
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=30, cast=int)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
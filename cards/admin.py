@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Stock, StockCard, Tag, SavedFilter, PriceSnapshot
+from .models import (
+    Stock, StockCard, StockPrice, PriceBar, Tag, SavedFilter, PriceSnapshot, OutboxMessage, DigestRun,
+    DigestDelivery,
+)
 
 
 @admin.register(Stock)
@@ -22,7 +25,7 @@ class StockCardAdmin(admin.ModelAdmin):
     list_filter = ['priority', 'is_archived', 'user']
     search_fields = ['stock__ticker', 'stock__company_name', 'user__username', 'notes']
     filter_horizontal = ['tags']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'last_price', 'last_price_at', 'last_source']
 
     fieldsets = (
         ('Stock Information', {
@@ -31,6 +34,9 @@ class StockCardAdmin(admin.ModelAdmin):
         ('Card Details', {
             'fields': ('notes', 'priority', 'target_price', 'tags', 'is_archived')
         }),
+        ('Latest Price', {
+            'fields': ('last_price', 'last_price_at', 'last_source')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -38,6 +44,22 @@ class StockCardAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(StockPrice)
+class StockPriceAdmin(admin.ModelAdmin):
+    list_display = ['stock', 'price', 'volume', 'source', 'timestamp']
+    list_filter = ['source', 'timestamp']
+    search_fields = ['stock__ticker']
+    date_hierarchy = 'timestamp'
+
+
+@admin.register(PriceBar)
+class PriceBarAdmin(admin.ModelAdmin):
+    list_display = ['stock', 'period', 'start', 'open', 'high', 'low', 'close', 'volume']
+    list_filter = ['period', 'start']
+    search_fields = ['stock__ticker']
+    date_hierarchy = 'start'
+
+
 @admin.register(PriceSnapshot)
 class PriceSnapshotAdmin(admin.ModelAdmin):
     list_display = ['stock_card', 'price', 'volume', 'source', 'timestamp']
@@ -54,3 +76,26 @@ class SavedFilterAdmin(admin.ModelAdmin):
     search_fields = ['name', 'user__username']
     filter_horizontal = ['tags']
 
+
+@admin.register(DigestRun)
+class DigestRunAdmin(admin.ModelAdmin):
+    list_display = ['week', 'started_at']
+    readonly_fields = ['started_at']
+
+
+@admin.register(DigestDelivery)
+class DigestDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['run', 'user', 'message', 'queued_at']
+    list_filter = ['run', 'message__status']
+    search_fields = ['user__username', 'user__email']
+    raw_id_fields = ['message']
+    readonly_fields = ['queued_at']
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['created_at', 'sent_at', 'claim_token']
+    date_hierarchy = 'created_at'
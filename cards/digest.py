@@ -0,0 +1,240 @@
+"""
+Weekly digest data, computed for many users at once.
+
+Users are streamed in chunks ordered by primary key. For each chunk, the
+active card counts and the notable movements of every user in it are read
+with two set-based queries over the stored 7-day changes on StockCard, and
+grouped by user in memory. A run costs three queries per chunk however
+many cards each user has, and memory stays bounded by the chunk size.
+
+Each notable movement's email section is rendered once per run and shared
+by every recipient watching the stock (see MovementSections), so building
+a user's digest is only assembly of already rendered text.
+
+Digest emails are not sent here but queued in the outbox (cards.outbox).
+Each week's run is recorded as a DigestRun, with one DigestDelivery per user
+written in the same transaction as the user's queued email. A restarted run
+only covers users whose digest hasn't been queued yet, and users can be
+split into shards by id so several processes can share a run.
+"""
+
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .models import DigestDelivery, DigestRun, StockCard
+from .outbox import enqueue
+
+# Number of users whose digests are computed together
+CHUNK_SIZE = 1000
+
+# Minimum absolute 7-day change (in percent) for a movement to be notable
+NOTABLE_CHANGE = 5
+
+
+def digest_users():
+    """Active users with an email address, the recipients of the digest."""
+    return User.objects.filter(is_active=True).exclude(email='')
+
+
+def current_week():
+    """Monday of the current week, in local time."""
+    today = timezone.localdate()
+    return today - timedelta(days=today.weekday())
+
+
+def get_run(week=None):
+    """
+    The digest run for a week, created on first use.
+
+    Args:
+        week (date, optional): Monday of the week (default: current_week())
+
+    Returns:
+        DigestRun: The run
+    """
+    run, _ = DigestRun.objects.get_or_create(week=week or current_week())
+    return run
+
+
+def pending_users(run, shard=None):
+    """
+    Recipients whose digest hasn't been queued in the run yet.
+
+    Args:
+        run (DigestRun): The run
+        shard (tuple, optional): (index, count) to only include users whose
+            id modulo ``count`` is ``index``
+
+    Returns:
+        QuerySet: Users
+    """
+    queued = DigestDelivery.objects.filter(run=run, user=OuterRef('pk'))
+    users = digest_users().exclude(Exists(queued))
+    if shard:
+        index, count = shard
+        users = users.alias(shard=Mod('pk', count)).filter(shard=index)
+    return users
+
+
+def queue_digests(run, emails):
+    """
+    Queue digest emails in the outbox and record them in the run, atomically.
+
+    Either every email of the batch is queued and checkpointed or none is,
+    so a resumed run neither skips nor duplicates anyone.
+
+    Args:
+        run (DigestRun): The run
+        emails (list): (user_id, EmailMessage) pairs
+    """
+    with transaction.atomic():
+        messages = enqueue([email for _, email in emails])
+        DigestDelivery.objects.bulk_create([
+            DigestDelivery(run=run, user_id=user_id, message=message)
+            for (user_id, _), message in zip(emails, messages)
+        ])
+
+
+def iter_user_chunks(users, chunk_size=CHUNK_SIZE):
+    """
+    Stream users in primary key order, ``chunk_size`` at a time.
+
+    Each chunk continues from the last primary key of the previous one, so
+    every chunk costs the same however far the run has got.
+
+    Args:
+        users (QuerySet): Users to stream
+        chunk_size (int): Users per chunk
+
+    Yields:
+        list: Users, with only id, username and email loaded
+    """
+    users = users.only('id', 'username', 'email').order_by('pk')
+    last_pk = None
+    while True:
+        chunk = users if last_pk is None else users.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def format_movement(ticker, company, price, change):
+    """
+    Render one notable movement as it appears in the digest email.
+
+    Args:
+        ticker (str): Stock ticker
+        company (str): Company name
+        price (Decimal): Latest price
+        change (float): 7-day change in percent
+
+    Returns:
+        str: The movement's section of the email
+    """
+    arrow = '📈' if change > 0 else '📉'
+    sign = '+' if change > 0 else ''
+    return (
+        f"\n{arrow} {ticker} - {company}\n"
+        f"   Current Price: ${price}\n"
+        f"   7-Day Change: {sign}{change:.2f}%\n"
+    )
+
+
+class MovementSections:
+    """
+    Rendered movement sections, memoized for the length of one digest run.
+
+    Every card on a stock shares its price and 7-day change unless a manual
+    price overrides them, so sections are keyed on the stock and the values
+    shown; each distinct section is rendered once however many users watch
+    the stock. Memory is bounded by the number of distinct stocks.
+    """
+
+    def __init__(self):
+        self._sections = {}
+
+    def __len__(self):
+        return len(self._sections)
+
+    def get(self, stock_id, ticker, company, price, change):
+        """The rendered section for a movement, rendering it on first use."""
+        key = (stock_id, price, change)
+        section = self._sections.get(key)
+        if section is None:
+            section = self._sections[key] = format_movement(ticker, company, price, change)
+        return section
+
+
+def notable_movements(cards):
+    """
+    Cards whose stored 7-day change is at least NOTABLE_CHANGE either way.
+
+    Args:
+        cards (QuerySet): StockCards to filter
+
+    Returns:
+        QuerySet: (user_id, stock_id, ticker, company, price, change) tuples
+    """
+    return (
+        cards.filter(Q(change_7d__gte=NOTABLE_CHANGE) | Q(change_7d__lte=-NOTABLE_CHANGE))
+        .order_by('user_id', 'priority', '-updated_at')
+        .values_list('user_id', 'stock_id', 'stock__ticker', 'stock__company_name', 'last_price', 'change_7d')
+    )
+
+
+def collect_digests(users, sections=None):
+    """
+    Compute the digests of a chunk of users with two queries.
+
+    Args:
+        users (list): Users to compute digests for
+        sections (MovementSections, optional): Section memo shared across
+            chunks (default: a new one)
+
+    Returns:
+        list: (user, digest) pairs in the order given, for users with at least
+        one active card; each digest is a dict with 'total_cards' and
+        'notable' (the rendered sections of the user's notable movements)
+    """
+    if sections is None:
+        sections = MovementSections()
+    cards = StockCard.objects.active().filter(user__in=[user.pk for user in users])
+
+    totals = dict(
+        cards.order_by().values('user_id').annotate(total=Count('id')).values_list('user_id', 'total')
+    )
+    notable = {}
+    for user_id, *movement in notable_movements(cards):
+        notable.setdefault(user_id, []).append(sections.get(*movement))
+
+    return [
+        (user, {'total_cards': totals[user.pk], 'notable': notable.get(user.pk, [])})
+        for user in users
+        if totals.get(user.pk)
+    ]
+
+
+def iter_digests(users=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream (user, digest) pairs for every recipient, a chunk at a time.
+
+    Movement sections are shared by all chunks of the run.
+
+    Args:
+        users (QuerySet, optional): Users to include (default: digest_users())
+        chunk_size (int): Users per chunk
+
+    Yields:
+        tuple: (user, digest) as returned by collect_digests()
+    """
+    if users is None:
+        users = digest_users()
+    sections = MovementSections()
+    for chunk in iter_user_chunks(users, chunk_size):
+        yield from collect_digests(chunk, sections)
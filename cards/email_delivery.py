@@ -0,0 +1,168 @@
+"""
+Batched email delivery.
+
+Messages are grouped into batches. Each batch is sent over one backend
+connection, opened once and reused for every message in it, instead of a
+new connection per message. Batches can be spread over a small thread pool,
+and a shared rate limiter caps throughput across all workers.
+
+Each message is sent on its own, so a failure (a refused recipient, a
+dropped connection) only loses that message: the connection is reopened
+and the batch carries on. Failures are returned to the caller to report.
+
+Works with any Django email backend, including the console and locmem
+backends used locally.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.mail import get_connection
+from itertools import islice
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Space out calls to wait() to at most ``rate`` per second, across threads.
+
+    Args:
+        rate (float): Maximum calls per second (0 for unlimited)
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next call is allowed."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def send_batch(messages, rate_limiter=None):
+    """
+    Send messages over one reused connection, isolating failures.
+
+    Args:
+        messages (list): EmailMessages to send
+        rate_limiter (RateLimiter, optional): Shared throughput limit
+
+    Returns:
+        tuple: (sent, failures) where sent is the number of messages sent
+        and failures lists (message, error) pairs
+    """
+    sent, failures = 0, []
+    connection = get_connection(fail_silently=False)
+    is_open = False
+
+    try:
+        for message in messages:
+            if rate_limiter:
+                rate_limiter.wait()
+            try:
+                if not is_open:
+                    connection.open()
+                    is_open = True
+                if connection.send_messages([message]):
+                    sent += 1
+                else:
+                    failures.append((message, 'Message was not sent (no recipients?)'))
+            except Exception as e:
+                logger.error(f"Error sending email to {', '.join(message.recipients())}: {str(e)}")
+                failures.append((message, str(e)))
+                # The connection may be unusable after an error; start a new one
+                _close(connection)
+                is_open = False
+    finally:
+        if is_open:
+            _close(connection)
+
+    return sent, failures
+
+
+def _batches(messages, batch_size):
+    messages = iter(messages)
+    while True:
+        batch = list(islice(messages, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def deliver(messages, batch_size=None, workers=None, rate=None, on_batch=None):
+    """
+    Send messages in batches, optionally on a pool of connections.
+
+    ``messages`` may be a generator; it is consumed lazily on the calling
+    thread (so it can read from the database), with at most two batches per
+    worker built ahead of sending.
+
+    Args:
+        messages (iterable): EmailMessages to send
+        batch_size (int, optional): Messages per connection
+            (default: settings.EMAIL_BATCH_SIZE)
+        workers (int, optional): Concurrent connections
+            (default: settings.EMAIL_SEND_WORKERS)
+        rate (float, optional): Maximum messages per second across all
+            workers, 0 for unlimited (default: settings.EMAIL_RATE_LIMIT)
+        on_batch (callable, optional): Called on the calling thread as
+            on_batch(batch, failures) as each batch completes, e.g. to
+            checkpoint progress
+
+    Returns:
+        dict: {'sent': number of messages sent,
+               'failed': list of (message, error) pairs}
+    """
+    if batch_size is None:
+        batch_size = settings.EMAIL_BATCH_SIZE
+    if workers is None:
+        workers = settings.EMAIL_SEND_WORKERS
+    if rate is None:
+        rate = settings.EMAIL_RATE_LIMIT
+
+    rate_limiter = RateLimiter(rate)
+    summary = {'sent': 0, 'failed': []}
+
+    def record(batch, result):
+        sent, failures = result
+        if on_batch:
+            on_batch(batch, failures)
+        summary['sent'] += sent
+        summary['failed'].extend(failures)
+        logger.info(f"Sent {summary['sent']} emails ({len(summary['failed'])} failed)...")
+
+    if workers <= 1:
+        for batch in _batches(messages, batch_size):
+            record(batch, send_batch(batch, rate_limiter))
+        return summary
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for batch in _batches(messages, batch_size):
+            pending[executor.submit(send_batch, batch, rate_limiter)] = batch
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(pending.pop(future), future.result())
+        for future, batch in pending.items():
+            record(batch, future.result())
+
+    return summary
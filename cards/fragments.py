@@ -0,0 +1,144 @@
+"""
+Cached dashboard fragments.
+
+Each card's rendered HTML is cached under a key built from version tokens
+and the denormalized price fields on the row:
+
+- a per-card version, bumped when the card, its tags or its manual prices
+  are written,
+- a per-user tags version, bumped when any of the user's tags is written
+  (tag names and colours appear on every card),
+- the card's updated_at, last_price_at and change_7d and the stock's
+  updated_at, read from the same row as the rendered data (price
+  refreshes use queryset updates, which send no signals).
+
+The user's tag and saved-filter lists are cached per user under their own
+versions. Versions are bumped by the signal handlers in cards.signals after
+the transaction commits, so a fragment is never cached under a new
+version with old data. Old entries are never deleted, only no longer
+looked up; they expire after FRAGMENT_CACHE_TIMEOUT.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.functional import SimpleLazyObject
+from django.utils.safestring import mark_safe
+import hashlib
+import uuid
+
+from .models import SavedFilter, Tag
+
+CARD_TEMPLATE = 'cards/partials/stock_card.html'
+
+
+def _cache():
+    return caches[settings.FRAGMENT_CACHE_BACKEND]
+
+
+def _version_key(scope, object_id):
+    return f'dashboard_version:{scope}:{object_id}'
+
+
+def bump_versions(scope, object_ids):
+    """
+    Invalidate everything cached under the given versions.
+
+    Args:
+        scope (str): 'card', 'tags' or 'filters'
+        object_ids (iterable): Card ids ('card') or user ids
+    """
+    keys = [_version_key(scope, object_id) for object_id in object_ids]
+    if keys:
+        _cache().delete_many(keys)
+
+
+def get_versions(scope, object_ids):
+    """
+    Current version tokens for the given objects, creating missing ones.
+
+    A missing (or evicted) version gets a fresh random token, so nothing
+    cached under an earlier token can ever match it again.
+
+    Returns:
+        dict: {object_id: token}
+    """
+    cache = _cache()
+    keys = {_version_key(scope, object_id): object_id for object_id in object_ids}
+    found = cache.get_many(keys)
+
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {keys[key]: token for key, token in found.items()}
+
+
+def _card_key(card, card_version, tags_version):
+    parts = [
+        card.pk,
+        card_version,
+        tags_version,
+        card.updated_at.timestamp(),
+        card.last_price_at.timestamp() if card.last_price_at else '',
+        card.change_7d,
+        card.stock.updated_at.timestamp(),
+    ]
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'dashboard_card:{digest}'
+
+
+def render_cards(cards, user):
+    """
+    Render dashboard cards, serving unchanged ones from the cache.
+
+    Tags are only loaded for the cards that have to be rendered.
+
+    Args:
+        cards (list): StockCards with ``stock`` selected
+        user (User): Owner of the cards
+
+    Returns:
+        list: Rendered HTML for each card, in order
+    """
+    cache = _cache()
+    card_versions = get_versions('card', [card.pk for card in cards])
+    tags_version = get_versions('tags', [user.pk])[user.pk]
+
+    keys = [_card_key(card, card_versions[card.pk], tags_version) for card in cards]
+    cached = cache.get_many(keys)
+
+    missing = [card for card, key in zip(cards, keys) if key not in cached]
+    if missing:
+        prefetch_related_objects(missing, 'tags')
+        rendered = {}
+        for card in missing:
+            key = _card_key(card, card_versions[card.pk], tags_version)
+            rendered[key] = render_to_string(CARD_TEMPLATE, {'card': card})
+        cache.set_many(rendered, settings.FRAGMENT_CACHE_TIMEOUT)
+        cached.update(rendered)
+
+    return [mark_safe(cached[key]) for key in keys]
+
+
+def _cached_list(scope, user, queryset):
+    version = get_versions(scope, [user.pk])[user.pk]
+    key = f'dashboard_{scope}:{user.pk}:{version}'
+    items = _cache().get(key)
+    if items is None:
+        items = list(queryset)
+        _cache().set(key, items, settings.FRAGMENT_CACHE_TIMEOUT)
+    return items
+
+
+def user_tags(user):
+    """The user's tags, cached until one of them is written (loaded lazily)."""
+    return SimpleLazyObject(lambda: _cached_list('tags', user, Tag.objects.filter(user=user)))
+
+
+def user_saved_filters(user):
+    """The user's saved filters, cached until one of them is written (loaded lazily)."""
+    return SimpleLazyObject(
+        lambda: _cached_list('filters', user, SavedFilter.objects.filter(user=user))
+    )
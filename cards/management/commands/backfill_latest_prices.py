@@ -0,0 +1,45 @@
+"""
+Django management command for backfilling the denormalized latest price
+and price change fields on StockCard from StockPrice and PriceSnapshot.
+Run with: python3 manage.py backfill_latest_prices
+"""
+
+from django.core.management.base import BaseCommand
+from cards.models import StockCard
+
+
+class Command(BaseCommand):
+    help = 'Recompute the latest price and 1/7/30-day changes on every stock card'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of cards updated per statement',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+
+        # Walk the cards in primary-key ranges so each UPDATE stays small
+        while True:
+            ids = list(
+                StockCard.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            updated += StockCard.backfill_latest_prices(
+                StockCard.objects.filter(pk__gte=ids[0], pk__lte=ids[-1])
+            )
+            last_id = ids[-1]
+            self.stdout.write(f'Backfilled {updated} cards...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully backfilled latest prices for {updated} cards')
+        )
@@ -0,0 +1,42 @@
+"""
+Django management command for compacting old stock prices into daily and
+weekly OHLC bars.
+Run with: python3 manage.py compact_prices
+"""
+
+from django.core.management.base import BaseCommand
+from cards.price_compaction import compact_prices, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Roll old raw prices into daily bars and old daily bars into weekly bars'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days',
+            type=int,
+            help='Keep raw prices for this many days (default: PRICE_RAW_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--daily-days',
+            type=int,
+            help='Keep daily bars for this many days (default: PRICE_DAILY_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of rows compacted and deleted per transaction',
+        )
+
+    def handle(self, *args, **options):
+        summary = compact_prices(
+            raw_days=options['raw_days'],
+            daily_days=options['daily_days'],
+            batch_size=options['batch_size'],
+        )
+
+        daily, weekly = summary['daily'], summary['weekly']
+        self.stdout.write(f"Raw prices compacted: {daily['rows']} ({daily['bars']} daily bars written)")
+        self.stdout.write(f"Daily bars compacted: {weekly['rows']} ({weekly['bars']} weekly bars written)")
+        self.stdout.write(self.style.SUCCESS('Price compaction complete'))
@@ -0,0 +1,67 @@
+"""
+Django management command for sending the emails queued in the outbox.
+Run with: python3 manage.py process_outbox
+
+By default it sends everything that is due and exits (run it from cron);
+with --loop it keeps polling for new messages. Several workers can run at
+once.
+"""
+
+from django.core.management.base import BaseCommand
+from cards.outbox import process_outbox, purge_sent
+import time
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails, retrying failed ones with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Emails claimed and sent per backend connection (default: EMAIL_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Concurrent backend connections (default: EMAIL_SEND_WORKERS)',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Maximum emails per second, 0 for unlimited (default: EMAIL_RATE_LIMIT)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new emails instead of exiting when none are due',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            summary = process_outbox(
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                rate=options['rate'],
+            )
+            purged = purge_sent()
+
+            if any(summary.values()) or not options['loop']:
+                self.stdout.write(
+                    f"Sent: {summary['sent']}, will retry: {summary['retried']}, "
+                    f"gave up: {summary['failed']}"
+                )
+            if purged:
+                self.stdout.write(f'Deleted {purged} old sent emails')
+
+            if not options['loop']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS('Outbox processed'))
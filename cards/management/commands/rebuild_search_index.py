@@ -0,0 +1,24 @@
+"""
+Django management command for rebuilding the dashboard search index.
+Run with: python3 manage.py rebuild_search_index
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from cards import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over stock cards'
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write(self.style.WARNING(
+                f'Search index is not available on {connection.vendor}; dashboard search uses plain filtering'
+            ))
+            return
+
+        with transaction.atomic():
+            indexed = search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {indexed} stock cards'))
@@ -1,18 +1,35 @@
 """
-Django management command for sending weekly stock digest emails.
+Django management command for queueing weekly stock digest emails.
 Run with: python3 manage.py send_weekly_digest
+
+The emails are queued in the outbox and sent by ``manage.py process_outbox``.
+Rerunning it in the same week resumes the week's run, skipping users whose
+digest was already queued. Split a run across processes with
+``--shard 0/4``, ``--shard 1/4``, ... (one per process).
 """
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
 from django.utils import timezone
-from datetime import timedelta
-from cards.models import StockCard, PriceSnapshot
+from cards.digest import CHUNK_SIZE, format_movement, get_run, iter_digests, pending_users, queue_digests
+from itertools import islice
+from cards.models import StockCard
+
+
+def parse_shard(value):
+    """Parse a shard given as 'INDEX/COUNT' (e.g. '0/4') into (index, count)."""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise CommandError(f"Invalid shard '{value}', expected INDEX/COUNT (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise CommandError(f"Invalid shard '{value}', INDEX must be between 0 and COUNT - 1")
+    return index, count
 
 
 class Command(BaseCommand):
-    help = 'Send weekly digest emails to all users with notable stock movements'
+    help = 'Queue weekly digest emails to all users with notable stock movements'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -20,9 +37,21 @@ class Command(BaseCommand):
             type=str,
             help='Send test digest to specific email address',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Number of users whose digests are computed together',
+        )
+        parser.add_argument(
+            '--shard',
+            type=str,
+            help='Only queue digests for users in this shard, as INDEX/COUNT (e.g. 0/4)',
+        )
 
     def handle(self, *args, **options):
         test_email = options.get('test_email')
+        self.digest_date = timezone.now().strftime("%B %d, %Y")
 
         if test_email:
             self.stdout.write(f'Sending test digest to {test_email}...')
@@ -30,76 +59,55 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f'Test digest sent to {test_email}'))
             return
 
-        users = User.objects.filter(is_active=True)
-        sent_count = 0
+        shard = parse_shard(options['shard']) if options['shard'] else None
+        run = get_run()
+        self.stdout.write(f'Queueing {run}' + (f" (shard {options['shard']})" if shard else '') + '...')
 
-        for user in users:
-            if user.email:
-                self.send_digest_to_user(user)
-                sent_count += 1
+        digests = iter_digests(pending_users(run, shard), chunk_size=options['chunk_size'])
+        queued_count = 0
+        while True:
+            chunk = list(islice(digests, options['chunk_size']))
+            if not chunk:
+                break
+            queue_digests(run, [(user.pk, self.build_digest_email(user, digest)) for user, digest in chunk])
+            queued_count += len(chunk)
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully sent {sent_count} weekly digest emails')
+            self.style.SUCCESS(f'Successfully queued {queued_count} weekly digest emails')
         )
+        self.stdout.write('Send them with: python3 manage.py process_outbox')
 
-    def send_digest_to_user(self, user):
-        """Send weekly digest to a specific user."""
-        cards = StockCard.objects.filter(user=user, is_archived=False)
+    def build_digest_email(self, user, digest):
+        """
+        Build the weekly digest email for a specific user.
 
-        if not cards.exists():
-            return
+        Args:
+            user (User): Recipient
+            digest (dict): The user's digest, from cards.digest.collect_digests
 
-        # Collect notable movements (>5% change in last 7 days)
-        notable_cards = []
-        for card in cards:
-            change = card.get_price_change_percentage(days=7)
-            if change is not None and abs(change) >= 5:
-                latest_price = card.get_latest_price()
-                notable_cards.append({
-                    'ticker': card.stock.ticker,
-                    'company': card.stock.company_name,
-                    'change': change,
-                    'price': latest_price.price if latest_price else None,
-                })
-
-        # Build email
-        subject = f'📈 Stock Cards Weekly Digest - {timezone.now().strftime("%B %d, %Y")}'
-        message = self.build_email_message(user, cards, notable_cards)
-
-        send_mail(
-            subject,
-            message,
-            None,  # Use DEFAULT_FROM_EMAIL
-            [user.email],
-            fail_silently=False,
-        )
+        Returns:
+            EmailMessage: The unsent message
+        """
+        subject = f'📈 Stock Cards Weekly Digest - {self.digest_date}'
+        message = self.build_email_message(user, digest['total_cards'], digest['notable'])
+        return EmailMessage(subject, message, None, [user.email])  # Use DEFAULT_FROM_EMAIL
 
     def send_digest_to_email(self, email, test_mode=False):
         """Send test digest to specific email."""
-        from django.contrib.auth.models import User
-
         # Use first user's data for test, or create sample data
         user = User.objects.first()
         if not user:
             message = "No users in database. Create a user first."
             subject = "Stock Cards Test Digest"
         else:
-            cards = StockCard.objects.filter(user=user, is_archived=False)
-            notable_cards = []
-
-            for card in cards[:5]:  # Limit to 5 for test
-                change = card.get_price_change_percentage(days=7)
-                latest_price = card.get_latest_price()
-                if change is not None:
-                    notable_cards.append({
-                        'ticker': card.stock.ticker,
-                        'company': card.stock.company_name,
-                        'change': change,
-                        'price': latest_price.price if latest_price else None,
-                    })
-
-            subject = f'📈 Stock Cards Weekly Digest (TEST) - {timezone.now().strftime("%B %d, %Y")}'
-            message = self.build_email_message(user, cards, notable_cards)
+            cards = StockCard.objects.active().filter(user=user)
+            notable_sections = [
+                format_movement(card.stock.ticker, card.stock.company_name, card.last_price, card.change_7d)
+                for card in cards.filter(change_7d__isnull=False).select_related('stock')[:5]  # Limit to 5 for test
+            ]
+
+            subject = f'📈 Stock Cards Weekly Digest (TEST) - {self.digest_date}'
+            message = self.build_email_message(user, cards.count(), notable_sections)
 
         send_mail(
             subject,
@@ -109,36 +117,35 @@ class Command(BaseCommand):
             fail_silently=False,
         )
 
-    def build_email_message(self, user, cards, notable_cards):
-        """Build the email message content."""
+    def build_email_message(self, user, total_cards, notable_sections):
+        """
+        Assemble the email message content.
+
+        Args:
+            user (User): Recipient
+            total_cards (int): Number of active cards
+            notable_sections (list): Rendered notable movement sections
+        """
         message_parts = [
             f'Hello {user.username},\n',
-            f'Here is your weekly Stock Cards digest for {timezone.now().strftime("%B %d, %Y")}.\n',
+            f'Here is your weekly Stock Cards digest for {self.digest_date}.\n',
             '\n' + '='*60 + '\n',
         ]
 
         # Notable movements section
-        if notable_cards:
+        if notable_sections:
             message_parts.append('\n📊 NOTABLE MOVEMENTS (±5% or more):\n')
             message_parts.append('-'*60 + '\n')
 
-            for card_data in notable_cards:
-                arrow = '📈' if card_data['change'] > 0 else '📉'
-                sign = '+' if card_data['change'] > 0 else ''
-
-                message_parts.append(
-                    f"\n{arrow} {card_data['ticker']} - {card_data['company']}\n"
-                    f"   Current Price: ${card_data['price']}\n"
-                    f"   7-Day Change: {sign}{card_data['change']:.2f}%\n"
-                )
+            message_parts.extend(notable_sections)
         else:
             message_parts.append('\n📊 No significant movements this week (±5% threshold).\n')
 
         # Summary section
         message_parts.append('\n' + '='*60 + '\n')
         message_parts.append(f'\n📋 SUMMARY:\n')
-        message_parts.append(f'   Total Active Cards: {cards.count()}\n')
-        message_parts.append(f'   Notable Movements: {len(notable_cards)}\n')
+        message_parts.append(f'   Total Active Cards: {total_cards}\n')
+        message_parts.append(f'   Notable Movements: {len(notable_sections)}\n')
 
         # Footer
         message_parts.append('\n' + '='*60 + '\n')
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockcard',
+            name='last_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockcard',
+            name='last_price_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockcard',
+            name='last_source',
+            field=models.CharField(blank=True, choices=[('api', 'API'), ('manual', 'Manual')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def move_api_snapshots_to_stock_prices(apps, schema_editor):
+    """
+    Collapse per-card API snapshots into one StockPrice row per stock.
+
+    Snapshots of the same stock with the same price taken within the same
+    minute came from the same refresh and are stored once.
+    """
+    PriceSnapshot = apps.get_model('cards', 'PriceSnapshot')
+    StockPrice = apps.get_model('cards', 'StockPrice')
+
+    rows = (
+        PriceSnapshot.objects.filter(source='api')
+        .order_by('stock_card__stock_id', 'timestamp')
+        .values_list('stock_card__stock_id', 'timestamp', 'price', 'volume')
+    )
+
+    batch = []
+    seen = set()
+    current_stock = None
+    for stock_id, timestamp, price, volume in rows.iterator(chunk_size=BATCH_SIZE):
+        if stock_id != current_stock:
+            current_stock = stock_id
+            seen = set()
+
+        key = (timestamp.replace(second=0, microsecond=0), price)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        batch.append(StockPrice(stock_id=stock_id, price=price, volume=volume, timestamp=timestamp, source='api'))
+        if len(batch) >= BATCH_SIZE:
+            StockPrice.objects.bulk_create(batch)
+            batch = []
+
+    StockPrice.objects.bulk_create(batch)
+    PriceSnapshot.objects.filter(source='api').delete()
+
+
+def copy_stock_prices_to_snapshots(apps, schema_editor):
+    """Reverse: give every card of the stock its own copy again."""
+    PriceSnapshot = apps.get_model('cards', 'PriceSnapshot')
+    StockCard = apps.get_model('cards', 'StockCard')
+    StockPrice = apps.get_model('cards', 'StockPrice')
+
+    cards_by_stock = {}
+    for card_id, stock_id in StockCard.objects.values_list('id', 'stock_id'):
+        cards_by_stock.setdefault(stock_id, []).append(card_id)
+
+    batch = []
+    for price in StockPrice.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for card_id in cards_by_stock.get(price.stock_id, []):
+            batch.append(PriceSnapshot(
+                stock_card_id=card_id,
+                price=price.price,
+                volume=price.volume,
+                timestamp=price.timestamp,
+                source=price.source,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            PriceSnapshot.objects.bulk_create(batch)
+            batch = []
+
+    PriceSnapshot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0002_stockcard_last_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('source', models.CharField(choices=[('api', 'API'), ('manual', 'Manual')], default='api', max_length=20)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prices', to='cards.stock')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['stock', '-timestamp'], name='cards_stock_stock_i_6d57f6_idx')],
+            },
+        ),
+        migrations.RunPython(move_api_snapshots_to_stock_prices, copy_stock_prices_to_snapshots),
+    ]
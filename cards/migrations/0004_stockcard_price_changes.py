@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:21
+
+import django.db.models.functions.math
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0003_stockprice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockcard',
+            name='change_1d',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockcard',
+            name='change_30d',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockcard',
+            name='change_7d',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='savedfilter',
+            name='sort_by',
+            field=models.CharField(choices=[('priority', 'Priority'), ('updated_at', 'Recently Updated'), ('created_at', 'Recently Created'), ('ticker', 'Ticker Symbol'), ('movers', 'Biggest Movers (7d)')], default='priority', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'change_7d'], name='cards_stock_user_id_0a0fc9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.OrderBy(django.db.models.functions.math.Abs('change_7d'), descending=True), name='cards_card_user_mover_idx'),
+        ),
+    ]
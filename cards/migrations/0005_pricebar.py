@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0004_stockcard_price_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Daily'), ('week', 'Weekly')], max_length=10)),
+                ('start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('volume', models.BigIntegerField(default=0)),
+                ('opened_at', models.DateTimeField()),
+                ('timestamp', models.DateTimeField()),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_bars', to='cards.stock')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['stock', '-timestamp'], name='cards_price_stock_i_b7c057_idx'), models.Index(fields=['period', 'start'], name='cards_price_period_fe19d3_idx')],
+                'unique_together': {('stock', 'period', 'start')},
+            },
+        ),
+    ]
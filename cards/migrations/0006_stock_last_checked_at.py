@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0005_pricebar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
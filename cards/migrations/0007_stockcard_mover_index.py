@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:26
+
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0006_stock_last_checked_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_mover_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.OrderBy(django.db.models.functions.comparison.Coalesce(django.db.models.functions.math.Abs('change_7d'), models.Value(-1.0)), descending=True), models.F('priority'), models.OrderBy(models.F('id'), descending=True), name='cards_card_user_mover_idx'),
+        ),
+    ]
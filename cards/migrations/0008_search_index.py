@@ -0,0 +1,78 @@
+from django.db import migrations, OperationalError
+
+
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE cards_search USING fts5("
+    "ticker, company_name, notes, tags, user_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+]
+
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE TABLE cards_search ("
+    "card_id bigint PRIMARY KEY REFERENCES cards_stockcard (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "user_id integer NOT NULL, "
+    "body text NOT NULL, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX cards_search_user_idx ON cards_search (user_id)",
+    "CREATE INDEX cards_search_document_idx ON cards_search USING gin (document)",
+    "CREATE INDEX cards_search_body_trgm_idx ON cards_search USING gin (body gin_trgm_ops)",
+]
+
+SQLITE_FILL = (
+    "INSERT INTO cards_search (rowid, ticker, company_name, notes, tags, user_id) "
+    "SELECT c.id, s.ticker, s.company_name, c.notes, "
+    "COALESCE((SELECT group_concat(t.name, ' ') FROM cards_tag t "
+    "JOIN cards_stockcard_tags ct ON ct.tag_id = t.id WHERE ct.stockcard_id = c.id), ''), c.user_id "
+    "FROM cards_stockcard c JOIN cards_stock s ON s.id = c.stock_id"
+)
+
+POSTGRES_FILL = (
+    "INSERT INTO cards_search (card_id, user_id, body, document) "
+    "SELECT c.id, c.user_id, concat_ws(' ', s.ticker, s.company_name, c.notes, tags.names), "
+    "setweight(to_tsvector('simple', s.ticker), 'A') || "
+    "setweight(to_tsvector('simple', s.company_name), 'B') || "
+    "setweight(to_tsvector('simple', tags.names), 'B') || "
+    "setweight(to_tsvector('simple', c.notes), 'C') "
+    "FROM cards_stockcard c JOIN cards_stock s ON s.id = c.stock_id, "
+    "LATERAL (SELECT COALESCE(string_agg(t.name, ' '), '') AS names FROM cards_tag t "
+    "JOIN cards_stockcard_tags ct ON ct.tag_id = t.id WHERE ct.stockcard_id = c.id) tags"
+)
+
+
+def create_search_index(apps, schema_editor):
+    """Create and fill the search table for the current database, if supported."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements, fill = SQLITE_CREATE, SQLITE_FILL
+    elif vendor == 'postgresql':
+        statements, fill = POSTGRES_CREATE, POSTGRES_FILL
+    else:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        except OperationalError:
+            if vendor != 'sqlite':
+                raise
+            # SQLite built without FTS5: search falls back to icontains filtering
+            return
+        cursor.execute(fill)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS cards_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0007_stockcard_mover_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
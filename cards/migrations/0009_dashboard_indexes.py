@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:31
+
+import django.db.models.functions.math
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_stock_tickers(apps, schema_editor):
+    StockCard = apps.get_model('cards', 'StockCard')
+    Stock = apps.get_model('cards', 'Stock')
+    StockCard.objects.update(
+        stock_ticker=Subquery(Stock.objects.filter(pk=OuterRef('stock_id')).values('ticker')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_stock_user_id_6dde8d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_mover_idx',
+        ),
+        migrations.AddField(
+            model_name='stockcard',
+            name='stock_ticker',
+            field=models.CharField(default='', editable=False, max_length=10),
+        ),
+        migrations.RunPython(copy_stock_tickers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'priority', '-updated_at', '-id'], name='cards_card_user_prio_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', '-updated_at', '-id'], name='cards_card_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='cards_card_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'priority', '-created_at', '-id'], name='cards_card_user_prio_crt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'stock_ticker', 'id'], name='cards_card_user_ticker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'priority', 'stock_ticker', 'id'], name='cards_card_user_prio_tkr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.OrderBy(models.Func(django.db.models.functions.math.Abs('change_7d'), output_field=models.FloatField(), template='COALESCE(%(expressions)s, -1.0)'), descending=True), models.F('priority'), models.OrderBy(models.F('id'), descending=True), name='cards_card_user_mover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.F('priority'), models.OrderBy(models.Func(django.db.models.functions.math.Abs('change_7d'), output_field=models.FloatField(), template='COALESCE(%(expressions)s, -1.0)'), descending=True), models.OrderBy(models.F('id'), descending=True), name='cards_card_user_prio_mover_idx'),
+        ),
+    ]
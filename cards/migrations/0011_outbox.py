@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-17 15:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def drop_failed_deliveries(apps, schema_editor):
+    # Deliveries now mean "queued"; failed ones must not count as done
+    DigestDelivery = apps.get_model('cards', 'DigestDelivery')
+    DigestDelivery.objects.filter(status='failed').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0010_digest_runs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('from_email', models.CharField(blank=True, max_length=255)),
+                ('recipients', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim_token', models.CharField(blank=True, max_length=32)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(drop_failed_deliveries, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='digestdelivery',
+            name='cards_diges_run_id_a05cdf_idx',
+        ),
+        migrations.RemoveField(
+            model_name='digestdelivery',
+            name='error',
+        ),
+        migrations.RemoveField(
+            model_name='digestdelivery',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='digestdelivery',
+            name='updated_at',
+        ),
+        migrations.AddField(
+            model_name='digestdelivery',
+            name='queued_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['status', 'next_attempt_at', 'id'], name='cards_outbo_status_58c0d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(fields=['claim_token'], name='cards_outbo_claim_t_314793_idx'),
+        ),
+        migrations.AddField(
+            model_name='digestdelivery',
+            name='message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='digest_deliveries', to='cards.outboxmessage'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:02
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_price_fields(apps, schema_editor):
+    """
+    Fill in the latest price and 1/7/30-day changes of existing cards.
+
+    0002 and 0004 added these fields empty, so until now existing cards only
+    got them once new prices arrived (or `manage.py backfill_latest_prices`
+    was run). The historical model has no methods, so this uses the current
+    StockCard.backfill_latest_prices, which needs the schema as of this
+    migration.
+    """
+    from cards.models import StockCard
+
+    last_id = 0
+    while True:
+        ids = list(
+            StockCard.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        StockCard.backfill_latest_prices(StockCard.objects.filter(pk__gte=ids[0], pk__lte=ids[-1]))
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0011_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_price_fields, migrations.RunPython.noop),
+    ]
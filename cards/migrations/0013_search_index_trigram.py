@@ -0,0 +1,55 @@
+from django.db import migrations, OperationalError
+
+
+SQLITE_COLUMNS = "ticker, company_name, notes, tags, user_id UNINDEXED"
+
+SQLITE_TRIGRAM = f"CREATE VIRTUAL TABLE cards_search USING fts5({SQLITE_COLUMNS}, tokenize = 'trigram')"
+
+SQLITE_WORDS = (
+    f"CREATE VIRTUAL TABLE cards_search USING fts5({SQLITE_COLUMNS}, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+SQLITE_FILL = (
+    "INSERT INTO cards_search (rowid, ticker, company_name, notes, tags, user_id) "
+    "SELECT c.id, s.ticker, s.company_name, c.notes, "
+    "COALESCE((SELECT group_concat(t.name, ' ') FROM cards_tag t "
+    "JOIN cards_stockcard_tags ct ON ct.tag_id = t.id WHERE ct.stockcard_id = c.id), ''), c.user_id "
+    "FROM cards_stockcard c JOIN cards_stock s ON s.id = c.stock_id"
+)
+
+
+def _recreate_sqlite_index(schema_editor, create):
+    if schema_editor.connection.vendor != 'sqlite':
+        # PostgreSQL already has a trigram index on the searched text (0008)
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS cards_search")
+        try:
+            cursor.execute(create)
+        except OperationalError:
+            # SQLite without FTS5 or the trigram tokenizer (3.34+): search
+            # falls back to icontains filtering
+            return
+        cursor.execute(SQLITE_FILL)
+
+
+def use_trigram_tokenizer(apps, schema_editor):
+    """Index every 3-character substring, so searches match inside words."""
+    _recreate_sqlite_index(schema_editor, SQLITE_TRIGRAM)
+
+
+def use_word_tokenizer(apps, schema_editor):
+    _recreate_sqlite_index(schema_editor, SQLITE_WORDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0012_backfill_price_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_trigram_tokenizer, use_word_tokenizer),
+    ]
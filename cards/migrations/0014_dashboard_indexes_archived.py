@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-17 16:07
+
+import django.db.models.functions.math
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0013_search_index_trigram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_stock_user_id_8152f4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_prio_upd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_prio_crt_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_ticker_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_prio_tkr_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_mover_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='stockcard',
+            name='cards_card_user_prio_mover_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', 'priority', '-updated_at', '-id'], name='cards_card_user_prio_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', '-updated_at', '-id'], name='cards_card_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', '-created_at', '-id'], name='cards_card_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', 'priority', '-created_at', '-id'], name='cards_card_user_prio_crt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', 'stock_ticker', 'id'], name='cards_card_user_ticker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(fields=['user', 'is_archived', 'priority', 'stock_ticker', 'id'], name='cards_card_user_prio_tkr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.F('is_archived'), models.OrderBy(models.Func(django.db.models.functions.math.Abs('change_7d'), output_field=models.FloatField(), template='COALESCE(%(expressions)s, -1.0)'), descending=True), models.F('priority'), models.OrderBy(models.F('id'), descending=True), name='cards_card_user_mover_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockcard',
+            index=models.Index(models.F('user'), models.F('is_archived'), models.F('priority'), models.OrderBy(models.Func(django.db.models.functions.math.Abs('change_7d'), output_field=models.FloatField(), template='COALESCE(%(expressions)s, -1.0)'), descending=True), models.OrderBy(models.F('id'), descending=True), name='cards_card_user_prio_mover_idx'),
+        ),
+    ]
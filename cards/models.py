@@ -1,9 +1,26 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Exists, F, FloatField, Func, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Abs, Cast, Coalesce, NullIf, Round
+from django.db.models.lookups import GreaterThan, IsNull
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 
 
+PRICE_SOURCE_CHOICES = [('api', 'API'), ('manual', 'Manual')]
+
+# Periods (in days) whose price change is stored on StockCard
+PRICE_CHANGE_PERIODS = (1, 7, 30)
+
+# Size of a card's 7-day move, with cards that have none sorting last; the
+# "Biggest Movers" ordering and its index both use this expression. The
+# fallback is written into the SQL rather than passed as a query parameter,
+# otherwise SQLite can't match the ORDER BY against the index expression.
+MOVER_EXPRESSION = Func(
+    Abs('change_7d'), template='COALESCE(%(expressions)s, -1.0)', output_field=FloatField()
+)
+
+
 class Stock(models.Model):
     """
     Represents a stock ticker symbol with basic information.
@@ -15,6 +32,9 @@ class Stock(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # When a price was last fetched, even if it was unchanged and not stored
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ['ticker']
 
@@ -22,6 +42,74 @@ class Stock(models.Model):
         return f"{self.ticker} - {self.company_name}" if self.company_name else self.ticker
 
 
+class StockPrice(models.Model):
+    """
+    Shared price series for a stock.
+    Each refresh writes at most one row per stock, which every card watching
+    the stock reads; manual prices stay per card in PriceSnapshot. Unchanged
+    prices are only stored as periodic heartbeats, so a price holds until
+    the next row.
+    """
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='prices')
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    timestamp = models.DateTimeField(default=timezone.now)
+    volume = models.BigIntegerField(null=True, blank=True)
+    source = models.CharField(max_length=20, choices=PRICE_SOURCE_CHOICES, default='api')
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['stock', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.stock.ticker} - ${self.price} at {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+
+
+class PriceBar(models.Model):
+    """
+    Compacted OHLC bar for a stock's older prices.
+    Raw StockPrice rows past retention are rolled into daily bars, and old
+    daily bars into weekly bars (see cards.price_compaction). ``timestamp``
+    is the time of the closing price, so a bar reads like a StockPrice.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Daily'),
+        ('week', 'Weekly'),
+    ]
+
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='price_bars')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+
+    open = models.DecimalField(max_digits=10, decimal_places=2)
+    high = models.DecimalField(max_digits=10, decimal_places=2)
+    low = models.DecimalField(max_digits=10, decimal_places=2)
+    close = models.DecimalField(max_digits=10, decimal_places=2)
+    volume = models.BigIntegerField(default=0)
+
+    opened_at = models.DateTimeField()
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-timestamp']
+        unique_together = ['stock', 'period', 'start']
+        indexes = [
+            models.Index(fields=['stock', '-timestamp']),
+            models.Index(fields=['period', 'start']),
+        ]
+
+    def __str__(self):
+        return f"{self.stock.ticker} - {self.get_period_display()} bar {self.start.strftime('%Y-%m-%d')}: ${self.close}"
+
+    @property
+    def price(self):
+        return self.close
+
+    def get_source_display(self):
+        return f"{self.get_period_display()} close"
+
+
 class Tag(models.Model):
     """
     User-defined tags for categorizing stock cards.
@@ -40,6 +128,92 @@ class Tag(models.Model):
         return f"{self.user.username} - {self.name}"
 
 
+def price_change_expressions(period):
+    """
+    Build expressions for a card's price ``period`` days ago and the change since.
+
+    The past price is the newest of the stock's shared price (raw or
+    compacted into a PriceBar) and the card's manual price at the cutoff,
+    looked up with correlated subqueries; the
+    change (percentage, rounded to 2 places) is measured against the
+    card's denormalized ``last_price``.
+
+    Args:
+        period (int): Period in days
+
+    Returns:
+        tuple: (past_price, change) expressions over StockCard rows
+    """
+    cutoff = timezone.now() - timezone.timedelta(days=period)
+    shared = StockPrice.objects.filter(
+        stock=OuterRef('stock_id'), timestamp__lte=cutoff
+    ).order_by('-timestamp')
+    bars = PriceBar.objects.filter(
+        stock=OuterRef('stock_id'), timestamp__lte=cutoff
+    ).order_by('-timestamp')
+    manual = PriceSnapshot.objects.filter(
+        stock_card=OuterRef('pk'), timestamp__lte=cutoff
+    ).order_by('-timestamp')
+
+    # Compacted bars are always older than the remaining raw prices, so
+    # they only matter once the cutoff is past raw retention
+    shared_at = Coalesce(Subquery(shared.values('timestamp')[:1]), Subquery(bars.values('timestamp')[:1]))
+    shared_price = Coalesce(Subquery(shared.values('price')[:1]), Subquery(bars.values('close')[:1]))
+    manual_at = Subquery(manual.values('timestamp')[:1])
+    past_price = Case(
+        When(
+            IsNull(manual_at, False) & (IsNull(shared_at, True) | GreaterThan(manual_at, shared_at)),
+            then=Subquery(manual.values('price')[:1]),
+        ),
+        default=shared_price,
+    )
+
+    past = NullIf(Cast(past_price, FloatField()), Value(0.0))
+    latest = Cast('last_price', FloatField())
+    change = Round((latest - past) * Value(100.0) / past, 2)
+    return past_price, change
+
+
+class StockCardQuerySet(models.QuerySet):
+    """QuerySet for StockCard with set-based price metrics."""
+
+    def with_price_changes(self, *days):
+        """
+        Annotate each card with its price N days ago and the change since.
+
+        For each period this adds ``past_price_<N>d`` and ``price_change_<N>d``
+        so the whole set costs one query regardless of size. For the stored
+        1/7/30-day changes (indexed, usable for sorting and filtering) use
+        the ``change_<N>d`` fields instead.
+
+        Args:
+            *days (int): Periods in days (default: 7)
+
+        Returns:
+            QuerySet: Annotated cards
+        """
+        annotations = {}
+        for period in days or (7,):
+            past_price, change = price_change_expressions(period)
+            annotations[f'past_price_{period}d'] = past_price
+            annotations[f'price_change_{period}d'] = change
+        return self.annotate(**annotations)
+
+    def active(self):
+        """
+        Cards that aren't archived.
+
+        Compared with ``= false`` rather than Django's ``NOT is_archived``
+        (what ``is_archived=False`` compiles to), which SQLite can't use as
+        an index constraint, so the user/is_archived-led indexes are seeked.
+        """
+        return self.filter(is_archived=Value(False))
+
+    def with_mover(self):
+        """Annotate each card with ``mover``, the size of its stored 7-day change (-1 if none)."""
+        return self.annotate(mover=MOVER_EXPRESSION)
+
+
 class StockCard(models.Model):
     """
     A user's tracked stock card with notes, priority, and tags.
@@ -55,6 +229,10 @@ class StockCard(models.Model):
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='cards')
     tags = models.ManyToManyField(Tag, blank=True, related_name='stock_cards')
 
+    # Copy of stock.ticker (tickers never change) so the dashboard's ticker
+    # sort can be served from a (user, ticker) index without a join
+    stock_ticker = models.CharField(max_length=10, editable=False, default='')
+
     # User-managed fields
     notes = models.TextField(blank=True)
     priority = models.IntegerField(choices=PRIORITY_CHOICES, default=2)
@@ -70,34 +248,198 @@ class StockCard(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StockCardQuerySet.as_manager()
+
     # Card state
     is_archived = models.BooleanField(default=False)
 
+    # Latest price, denormalized from the stock's StockPrice series and the
+    # card's manual PriceSnapshots so the dashboard doesn't need a query per
+    # card. Kept in sync by update_latest_prices().
+    last_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    last_price_at = models.DateTimeField(null=True, blank=True)
+    last_source = models.CharField(max_length=20, choices=PRICE_SOURCE_CHOICES, blank=True)
+
+    # Price change (percent) over PRICE_CHANGE_PERIODS as of last_price,
+    # stored so the dashboard can sort by movers and the digest can filter
+    # on them. Recomputed for every card on a stock each time the stock is
+    # refreshed (even if its price is unchanged) and when manual prices are
+    # written. Cards on stocks that are no longer refreshed (every card
+    # archived, or every fetch failing) keep the changes of their last
+    # refresh until `manage.py backfill_latest_prices` is run.
+    change_1d = models.FloatField(null=True, blank=True)
+    change_7d = models.FloatField(null=True, blank=True)
+    change_30d = models.FloatField(null=True, blank=True)
+
     class Meta:
         ordering = ['priority', '-updated_at']
         unique_together = ['user', 'stock']
+        # One index per dashboard ordering, led by user and is_archived (and
+        # priority for the priority filter), so every filter/sort combination
+        # of the default active-only view is read in index order without a
+        # sort step; see DASHBOARD_SORT_OPTIONS in views.py. Showing archived
+        # cards as well sorts the user's cards instead.
         indexes = [
-            models.Index(fields=['user', 'priority']),
-            models.Index(fields=['user', 'is_archived']),
+            models.Index(fields=['user', 'is_archived', 'priority', '-updated_at', '-id'], name='cards_card_user_prio_upd_idx'),
+            models.Index(fields=['user', 'is_archived', '-updated_at', '-id'], name='cards_card_user_updated_idx'),
+            models.Index(fields=['user', 'is_archived', '-created_at', '-id'], name='cards_card_user_created_idx'),
+            models.Index(fields=['user', 'is_archived', 'priority', '-created_at', '-id'], name='cards_card_user_prio_crt_idx'),
+            models.Index(fields=['user', 'is_archived', 'stock_ticker', 'id'], name='cards_card_user_ticker_idx'),
+            models.Index(fields=['user', 'is_archived', 'priority', 'stock_ticker', 'id'], name='cards_card_user_prio_tkr_idx'),
+            models.Index(fields=['user', 'change_7d']),
+            models.Index(
+                F('user'), F('is_archived'), MOVER_EXPRESSION.desc(), F('priority'), F('id').desc(),
+                name='cards_card_user_mover_idx',
+            ),
+            models.Index(
+                F('user'), F('is_archived'), F('priority'), MOVER_EXPRESSION.desc(), F('id').desc(),
+                name='cards_card_user_prio_mover_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.user.username} - {self.stock.ticker}"
 
+    def save(self, *args, **kwargs):
+        """Keep the denormalized ticker in sync with the stock."""
+        if self.stock_id and (StockCard.stock.field.is_cached(self) or not self.stock_ticker):
+            self.stock_ticker = self.stock.ticker
+        super().save(*args, **kwargs)
+
     def get_latest_price(self):
-        """Get the most recent price snapshot for this card."""
-        return self.price_snapshots.order_by('-timestamp').first()
+        """
+        Get the most recent price for this card.
+
+        Returns:
+            StockPrice or PriceSnapshot: The newest of the stock's shared
+            price and the card's manual prices, or None
+        """
+        return self._latest_price_before(None)
+
+    def get_price_history(self, limit=30):
+        """Get the most recent prices (shared, compacted and manual), newest first."""
+        shared = list(self.stock.prices.order_by('-timestamp')[:limit])
+        manual = list(self.price_snapshots.order_by('-timestamp')[:limit])
+        bars = []
+        if len(shared) < limit:
+            bars = list(self.stock.price_bars.order_by('-timestamp')[:limit - len(shared)])
+        history = sorted(shared + bars + manual, key=lambda price: price.timestamp, reverse=True)
+        return history[:limit]
+
+    def _latest_price_before(self, when):
+        """Newest shared, compacted or manual price at or before ``when`` (None = now)."""
+        shared = self.stock.prices.order_by('-timestamp')
+        bars = self.stock.price_bars.order_by('-timestamp')
+        manual = self.price_snapshots.order_by('-timestamp')
+        if when is not None:
+            shared = shared.filter(timestamp__lte=when)
+            bars = bars.filter(timestamp__lte=when)
+            manual = manual.filter(timestamp__lte=when)
+
+        shared_price = shared.first() or bars.first()
+        candidates = [price for price in (shared_price, manual.first()) if price]
+        return max(candidates, key=lambda price: price.timestamp, default=None)
+
+    @classmethod
+    def update_latest_prices(cls, prices):
+        """
+        Copy the newest of the given prices onto the cards' last_price fields.
+
+        Accepts StockPrice rows (applied to every card of the stock) and
+        PriceSnapshot rows (applied to their own card). Cards receiving the
+        same price at the same time are updated with a single UPDATE, and a
+        card's latest price only ever moves forward in time.
+        """
+        latest = {}
+        for price in prices:
+            if isinstance(price, StockPrice):
+                target = ('stock_id', price.stock_id)
+            else:
+                target = ('pk', price.stock_card_id)
+
+            current = latest.get(target)
+            if current is None or price.timestamp >= current.timestamp:
+                latest[target] = price
+
+        groups = {}
+        for (field, target_id), price in latest.items():
+            key = (field, price.price, price.timestamp, price.source)
+            groups.setdefault(key, []).append(target_id)
+
+        updated = 0
+        affected = Q()
+        for (field, price, timestamp, source), target_ids in groups.items():
+            updated += cls.objects.filter(
+                Q(last_price_at__isnull=True) | Q(last_price_at__lte=timestamp),
+                **{f'{field}__in': target_ids}
+            ).update(last_price=price, last_price_at=timestamp, last_source=source)
+            affected |= Q(**{f'{field}__in': target_ids})
+
+        if affected:
+            cls.update_price_changes(cls.objects.filter(affected))
+        return updated
+
+    @classmethod
+    def update_price_changes(cls, queryset=None):
+        """Recompute the stored change_<N>d fields for the given cards in one UPDATE."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(**{
+            f'change_{period}d': price_change_expressions(period)[1]
+            for period in PRICE_CHANGE_PERIODS
+        })
+
+    @classmethod
+    def backfill_latest_prices(cls, queryset=None):
+        """Recompute last_price fields from StockPrice and PriceSnapshot for the given cards."""
+        queryset = cls.objects.all() if queryset is None else queryset
+
+        # Start from the stock's shared series (or its newest bar if every
+        # raw price has been compacted)...
+        shared = StockPrice.objects.filter(stock=OuterRef('stock_id')).order_by('-timestamp')
+        bars = PriceBar.objects.filter(stock=OuterRef('stock_id')).order_by('-timestamp')
+        updated = queryset.update(
+            last_price=Coalesce(Subquery(shared.values('price')[:1]), Subquery(bars.values('close')[:1])),
+            last_price_at=Coalesce(Subquery(shared.values('timestamp')[:1]), Subquery(bars.values('timestamp')[:1])),
+            last_source=Coalesce(
+                Subquery(shared.values('source')[:1]),
+                Case(When(Exists(bars), then=Value('api')), default=Value('')),
+            ),
+        )
+
+        # ...then let newer manual prices win
+        manual = PriceSnapshot.objects.filter(stock_card=OuterRef('pk')).order_by('-timestamp')
+        queryset.annotate(
+            manual_at=Subquery(manual.values('timestamp')[:1])
+        ).filter(
+            Q(last_price_at__isnull=True) | Q(last_price_at__lt=F('manual_at')),
+            manual_at__isnull=False,
+        ).update(
+            last_price=Subquery(manual.values('price')[:1]),
+            last_price_at=Subquery(manual.values('timestamp')[:1]),
+            last_source=Subquery(manual.values('source')[:1]),
+        )
+
+        cls.update_price_changes(queryset)
+        return updated
 
     def get_price_change_percentage(self, days=7):
-        """Calculate price change percentage over the specified days."""
-        latest = self.price_snapshots.order_by('-timestamp').first()
+        """
+        Calculate price change percentage over the specified days.
+
+        Uses the ``price_change_<N>d`` annotation when the card was loaded
+        through StockCard.objects.with_price_changes(); prefer that when
+        computing changes for many cards.
+        """
+        annotated = f'price_change_{days}d'
+        if annotated in self.__dict__:
+            return self.__dict__[annotated]
+
+        latest = self.get_latest_price()
         if not latest:
             return None
 
         past_date = timezone.now() - timezone.timedelta(days=days)
-        past_price = self.price_snapshots.filter(
-            timestamp__lte=past_date
-        ).order_by('-timestamp').first()
+        past_price = self._latest_price_before(past_date)
 
         if not past_price or past_price.price == 0:
             return None
@@ -108,8 +450,8 @@ class StockCard(models.Model):
 
 class PriceSnapshot(models.Model):
     """
-    Stores historical price data for stock cards.
-    This allows users to track price changes over time.
+    Stores manually entered prices for a stock card.
+    API prices are shared per stock in StockPrice.
     """
     stock_card = models.ForeignKey(
         StockCard,
@@ -123,7 +465,7 @@ class PriceSnapshot(models.Model):
     volume = models.BigIntegerField(null=True, blank=True)
     source = models.CharField(
         max_length=20,
-        choices=[('api', 'API'), ('manual', 'Manual')],
+        choices=PRICE_SOURCE_CHOICES,
         default='api'
     )
 
@@ -136,6 +478,19 @@ class PriceSnapshot(models.Model):
     def __str__(self):
         return f"{self.stock_card.stock.ticker} - ${self.price} at {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
 
+    def save(self, *args, **kwargs):
+        """Save and keep the card's denormalized latest price in sync."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            StockCard.update_latest_prices([self])
+
+    def delete(self, *args, **kwargs):
+        """Delete and recompute the card's latest price from what remains."""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            StockCard.backfill_latest_prices(StockCard.objects.filter(pk=self.stock_card_id))
+        return result
+
 
 class SavedFilter(models.Model):
     """
@@ -161,6 +516,7 @@ class SavedFilter(models.Model):
             ('updated_at', 'Recently Updated'),
             ('created_at', 'Recently Created'),
             ('ticker', 'Ticker Symbol'),
+            ('movers', 'Biggest Movers (7d)'),
         ],
         default='priority'
     )
@@ -180,3 +536,84 @@ class SavedFilter(models.Model):
         if self.is_default:
             SavedFilter.objects.filter(user=self.user, is_default=True).update(is_default=False)
         super().save(*args, **kwargs)
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be sent, or already sent, by the outbox worker.
+    Code that sends mail enqueues rows here instead of talking to the mail
+    server; ``manage.py process_outbox`` drains them in batches with retries
+    and backoff (see cards.outbox).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # When a pending message is next due; a claimed message is leased to its
+    # worker by pushing this forward
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at', 'id']),
+            models.Index(fields=['claim_token']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+
+class DigestRun(models.Model):
+    """
+    One weekly digest run, identified by the week it covers.
+    Reruns of send_weekly_digest in the same week continue the same run, and
+    its deliveries record which users' digests have already been queued.
+    """
+    week = models.DateField(unique=True, help_text="Monday of the week the digest covers")
+    started_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-week']
+
+    def __str__(self):
+        return f"Digest for week of {self.week}"
+
+
+class DigestDelivery(models.Model):
+    """
+    A user's digest within a run, queued in the outbox.
+    Written in the same transaction as the outbox message, so users with a
+    delivery are skipped when the run is resumed; whether the email has
+    been sent yet is tracked on the message.
+    """
+    run = models.ForeignKey(DigestRun, on_delete=models.CASCADE, related_name='deliveries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='digest_deliveries')
+    message = models.ForeignKey(
+        OutboxMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='digest_deliveries'
+    )
+    queued_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['run', 'user']
+
+    def __str__(self):
+        return f"{self.run} - {self.user.username}"
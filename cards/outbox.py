@@ -0,0 +1,204 @@
+"""
+Durable email outbox.
+
+Mail is never sent by the code that builds it: enqueue() stores each
+message as an OutboxMessage row, usually in the same transaction as the
+work that produced it, and ``manage.py process_outbox`` sends them later.
+The table is the queue, so there is no broker to run, and it works the
+same on SQLite locally and PostgreSQL in production.
+
+Workers claim due messages in batches: the rows are stamped with a random
+claim token and their next_attempt_at is pushed forward by OUTBOX_LEASE,
+so concurrent workers never claim the same rows, and if a worker dies its
+messages become due again once the lease runs out. Claimed messages are
+sent through cards.email_delivery (reused connections, worker pool, rate
+limit). A failed message is retried with exponential backoff until
+OUTBOX_MAX_ATTEMPTS, then marked failed.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+import logging
+import uuid
+
+from .email_delivery import deliver
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(messages):
+    """
+    Store email messages in the outbox to be sent by the worker.
+
+    Args:
+        messages (list): EmailMessages (only subject, body, from_email and
+            to are kept)
+
+    Returns:
+        list: The created OutboxMessages, in the same order
+    """
+    return OutboxMessage.objects.bulk_create([
+        OutboxMessage(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email or '',
+            recipients=list(message.to),
+        )
+        for message in messages
+    ])
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to ``batch_size`` due messages for this worker.
+
+    Returns:
+        list: Claimed OutboxMessages, oldest due first
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = OutboxMessage.objects.filter(status='pending', next_attempt_at__lte=now)
+
+    # One UPDATE claims the rows: on PostgreSQL the subquery skips rows
+    # another worker is claiming (FOR UPDATE SKIP LOCKED); SQLite ignores
+    # the locking clause and runs concurrent UPDATEs one after another
+    claimable = (
+        due.select_for_update(skip_locked=True)
+        .order_by('next_attempt_at', 'id')
+        .values('pk')[:batch_size]
+    )
+    with transaction.atomic():
+        claimed = due.filter(pk__in=Subquery(claimable)).update(
+            claim_token=token,
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE),
+            attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return []
+
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by('next_attempt_at', 'id'))
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a message that has failed ``attempts`` times."""
+    return min(settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1), settings.OUTBOX_MAX_BACKOFF)
+
+
+def record_results(rows, failures):
+    """
+    Mark a sent batch's messages as sent, or schedule failed ones for retry.
+
+    Args:
+        rows (list): The claimed OutboxMessages that were sent
+        failures (dict): {outbox message id: error message} for failed ones
+
+    Returns:
+        dict: {'sent': n, 'retried': n, 'failed': n} for the batch
+    """
+    now = timezone.now()
+    summary = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    sent_ids = [row.pk for row in rows if row.pk not in failures]
+    if sent_ids:
+        OutboxMessage.objects.filter(pk__in=sent_ids).update(
+            status='sent', sent_at=now, claim_token='', last_error=''
+        )
+        summary['sent'] = len(sent_ids)
+
+    failed = [row for row in rows if row.pk in failures]
+    for row in failed:
+        row.last_error = failures[row.pk]
+        row.claim_token = ''
+        if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            row.status = 'failed'
+            summary['failed'] += 1
+            logger.error(f"Giving up on outbox message {row.pk} after {row.attempts} attempts")
+        else:
+            row.next_attempt_at = now + timedelta(seconds=retry_delay(row.attempts))
+            summary['retried'] += 1
+    OutboxMessage.objects.bulk_update(failed, ['status', 'next_attempt_at', 'claim_token', 'last_error'])
+
+    return summary
+
+
+def _claimed_messages(batch_size, claimed):
+    """Claim batches until nothing is due, yielding them as EmailMessages."""
+    while True:
+        rows = claim_batch(batch_size)
+        if not rows:
+            return
+        for row in rows:
+            claimed[row.pk] = row
+            message = EmailMessage(row.subject, row.body, row.from_email or None, row.recipients)
+            message.outbox_id = row.pk
+            yield message
+
+
+def process_outbox(batch_size=None, workers=None, rate=None):
+    """
+    Send every message that is due, until none are left.
+
+    Args:
+        batch_size (int, optional): Messages claimed and sent per connection
+            (default: settings.EMAIL_BATCH_SIZE)
+        workers (int, optional): Concurrent connections
+            (default: settings.EMAIL_SEND_WORKERS)
+        rate (float, optional): Maximum messages per second, 0 for unlimited
+            (default: settings.EMAIL_RATE_LIMIT)
+
+    Returns:
+        dict: {'sent': n, 'retried': n, 'failed': n} where failed counts
+        messages that ran out of attempts
+    """
+    if batch_size is None:
+        batch_size = settings.EMAIL_BATCH_SIZE
+
+    summary = {'sent': 0, 'retried': 0, 'failed': 0}
+    claimed = {}
+
+    def on_batch(batch, failures):
+        rows = [claimed.pop(message.outbox_id) for message in batch]
+        result = record_results(rows, {message.outbox_id: error for message, error in failures})
+        for key, count in result.items():
+            summary[key] += count
+
+    deliver(
+        _claimed_messages(batch_size, claimed),
+        batch_size=batch_size,
+        workers=workers,
+        rate=rate,
+        on_batch=on_batch,
+    )
+    return summary
+
+
+def purge_sent(older_than_days=None, batch_size=1000):
+    """
+    Delete sent messages older than the retention period.
+
+    Args:
+        older_than_days (int, optional): Retention in days
+            (default: settings.OUTBOX_RETENTION_DAYS)
+        batch_size (int): Rows deleted per statement
+
+    Returns:
+        int: Number of messages deleted
+    """
+    if older_than_days is None:
+        older_than_days = settings.OUTBOX_RETENTION_DAYS
+
+    old = OutboxMessage.objects.filter(
+        status='sent', sent_at__lt=timezone.now() - timedelta(days=older_than_days)
+    )
+    deleted = 0
+    while True:
+        ids = list(old.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        OutboxMessage.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, each page continues from the sort key of the last row of
+the previous page, so the database seeks straight to it through the index
+and every page costs the same however deep the user has scrolled. The
+cursor is an opaque, URL-safe encoding of that sort key.
+"""
+
+from django.core import signing
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor can't be decoded or doesn't match the ordering."""
+
+
+class KeysetPage:
+    """One page of results and the cursor for the next one (None on the last page)."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on an ordering that ends in a unique field.
+
+    Args:
+        queryset (QuerySet): Rows to paginate
+        ordering (list): Field or annotation names, '-' prefixed for
+            descending; the last one must be unique (e.g. '-id'). Values
+            must not be NULL.
+        page_size (int): Rows per page
+    """
+
+    salt = 'cards.pagination'
+
+    def __init__(self, queryset, ordering, page_size=24):
+        self.queryset = queryset.order_by(*ordering)
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.page_size = page_size
+
+    def page(self, cursor=None):
+        """
+        Get the page following ``cursor`` (the first page if None).
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or from another ordering
+        """
+        items = list(self.page_queryset(cursor))
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            next_cursor = self._encode(items[-1])
+        return KeysetPage(items, next_cursor)
+
+    def page_queryset(self, cursor=None):
+        """
+        The query for the page following ``cursor``, with one extra row to
+        tell whether there is a next page.
+
+        Raises:
+            InvalidCursor: If the cursor is malformed or from another ordering
+        """
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self._after(self._decode(cursor)))
+        return queryset[:self.page_size + 1]
+
+    def _after(self, values):
+        """Filter for rows strictly after ``values`` in the ordering."""
+        # k1 >= v1 AND ((k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...): the OR
+        # chain alone can't be used as an index range, so the bound on the
+        # leading key is what lets the database seek to the cursor
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        name, descending = self.keys[0]
+        return Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+    def _value(self, item, name):
+        value = item
+        for attr in name.split('__'):
+            value = getattr(value, attr)
+        return value
+
+    def _encode(self, item):
+        values = [self._value(item, name) for name, _ in self.keys]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return signing.dumps([name for name, _ in self.keys] + values, salt=self.salt, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            raise InvalidCursor(cursor)
+
+        names, values = data[:len(self.keys)], data[len(self.keys):]
+        if names != [name for name, _ in self.keys] or len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        return values
@@ -1,19 +1,91 @@
 """
 Stock price adapter with caching and manual fallback.
-Uses yfinance for fetching U.S. stock prices with multiple fallback methods.
+Fetches U.S. stock prices through the configured price provider (yfinance
+by default, see price_providers.py) with multiple fallback methods.
 """
 
-import yfinance as yf
-from datetime import datetime, timedelta
-from django.core.cache import cache
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.utils import timezone
-from decimal import Decimal
 import logging
+import threading
 import time
 
+from .price_cache import TwoTierCache
+from .price_providers import get_price_provider
+
 logger = logging.getLogger(__name__)
 
 
+class _InFlightFetch:
+    """A price fetch in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class MethodStats:
+    """
+    Success rate, latency and circuit breaker state for one fetch method.
+
+    Success rate and latency are exponentially weighted so recent calls
+    dominate. After ``failure_threshold`` consecutive failures the breaker
+    opens and the method is skipped for ``cooldown`` seconds; the first call
+    after the cool-down is a trial that either closes or re-opens it.
+    """
+
+    SMOOTHING = 0.3  # Weight of the newest sample
+    DEFAULT_LATENCY = 1.0  # Assumed latency (seconds) before any samples
+
+    def __init__(self, name, failure_threshold=5, cooldown=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.success_rate = 1.0
+        self.avg_latency = self.DEFAULT_LATENCY
+        self.open_until = None
+
+    def record(self, success, latency):
+        """Record the outcome of one call."""
+        self.avg_latency += self.SMOOTHING * (latency - self.avg_latency)
+        self.success_rate += self.SMOOTHING * ((1.0 if success else 0.0) - self.success_rate)
+
+        if success:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.open_until = None
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                if self.open_until is None:
+                    logger.warning(f"Circuit breaker opened for {self.name} price method")
+                self.open_until = time.monotonic() + self.cooldown
+
+    def is_open(self):
+        """Whether the breaker is open (method should be skipped)."""
+        return self.open_until is not None and time.monotonic() < self.open_until
+
+    def score(self):
+        """Expected cost of trying this method first (lower is better)."""
+        return self.avg_latency / max(self.success_rate, 0.05)
+
+    def as_dict(self):
+        return {
+            'method': self.name,
+            'successes': self.successes,
+            'failures': self.failures,
+            'success_rate': round(self.success_rate, 3),
+            'avg_latency': round(self.avg_latency, 3),
+            'circuit_open': self.is_open(),
+        }
+
+
 class StockPriceAdapter:
     """
     Adapter for fetching stock prices with built-in caching.
@@ -22,16 +94,70 @@ class StockPriceAdapter:
     """
 
     CACHE_TIMEOUT = 60 * 15  # 15 minutes cache
-
-    def __init__(self):
-        self.cache_prefix = 'stock_price_'
-
-    def get_stock_price(self, ticker):
+    INFO_CACHE_TIMEOUT = 60 * 60 * 24  # Company info rarely changes
+
+    # Cache key prefix per category; each category is versioned separately
+    CACHE_PREFIXES = {
+        'price': 'stock_price_',
+        'missing': 'stock_price_missing_',
+        'info': 'stock_info_',
+    }
+    GENERATION_PREFIX = 'price_cache_generation_'
+
+    def __init__(self, provider=None):
+        self.provider = provider or get_price_provider()
+
+        # Two-tier cache: in-process LRU (L1) in front of a backend shared by
+        # all worker processes (L2)
+        self.cache = TwoTierCache(
+            backend=getattr(settings, 'PRICE_CACHE_BACKEND', 'default'),
+            l1_max_entries=getattr(settings, 'PRICE_L1_MAX_ENTRIES', 1000),
+            l1_timeout=getattr(settings, 'PRICE_L1_TIMEOUT', 30),
+            sync_interval=getattr(settings, 'PRICE_L1_SYNC_INTERVAL', 5),
+        )
+
+        # Negative cache: tickers that failed pricing or validation are
+        # remembered for a shorter time so bad symbols don't hit the network
+        self.negative_timeout = getattr(settings, 'PRICE_NEGATIVE_CACHE_TIMEOUT', 60 * 5)
+
+        # Stale-while-revalidate: prices older than the soft timeout are still
+        # served (up to the hard timeout) while a background worker refreshes them
+        self.stale_while_revalidate = getattr(settings, 'PRICE_CACHE_STALE_WHILE_REVALIDATE', False)
+        self.soft_timeout = getattr(settings, 'PRICE_CACHE_SOFT_TIMEOUT', self.CACHE_TIMEOUT)
+        self.hard_timeout = getattr(settings, 'PRICE_CACHE_HARD_TIMEOUT', self.CACHE_TIMEOUT)
+        self.refresh_workers = getattr(settings, 'PRICE_REFRESH_WORKERS', 2)
+
+        self._refresh_executor = None
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+        # Single-flight: concurrent misses for a ticker share one fetch.
+        # 'local' coalesces within this process; 'cache' additionally takes a
+        # lock in the cache backend so other processes wait for the result.
+        self.fetch_lock_mode = getattr(settings, 'PRICE_FETCH_LOCK', 'local')
+        self.fetch_lock_timeout = getattr(settings, 'PRICE_FETCH_LOCK_TIMEOUT', 30)
+        self.lock_prefix = 'stock_price_lock_'
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+        # Per-method stats drive the fallback order and circuit breakers
+        failure_threshold = getattr(settings, 'PRICE_METHOD_FAILURE_THRESHOLD', 5)
+        cooldown = getattr(settings, 'PRICE_METHOD_COOLDOWN', 300)
+        self.price_methods = self.provider.get_price_methods()
+        self._method_stats = {
+            name: MethodStats(name, failure_threshold, cooldown)
+            for name in ['bulk'] + [name for name, _ in self.price_methods]
+        }
+        self._stats_lock = threading.Lock()
+
+    def get_stock_price(self, ticker, allow_stale=True):
         """
         Get current stock price for a ticker using multiple fallback methods.
 
         Args:
             ticker (str): Stock ticker symbol (e.g., 'AAPL')
+            allow_stale (bool): Serve a stale cached price while refreshing it
+                in the background (only when stale-while-revalidate is on)
 
         Returns:
             dict: {
@@ -46,120 +172,341 @@ class StockPriceAdapter:
         ticker = ticker.upper().strip()
 
         # Check cache first
-        cache_key = f"{self.cache_prefix}{ticker}"
-        cached_data = cache.get(cache_key)
+        cache_key = self._cache_key('price', ticker)
+        cached_data = self.cache.get(cache_key)
 
         if cached_data:
-            logger.info(f"Cache hit for {ticker}")
-            cached_data['source'] = 'cache'
-            return cached_data
-
-        # Try multiple methods in order (prioritize fastest, most reliable)
-        data = None
-
-        # Method 1: Try fast_info first (most reliable with yfinance 0.2.66+)
-        data = self._try_fast_info_method(ticker)
-
-        # Method 2: If fast_info fails, try download method
-        if not data:
-            data = self._try_download_method(ticker)
+            if self._is_fresh(cached_data):
+                logger.info(f"Cache hit for {ticker}")
+                cached_data['source'] = 'cache'
+                return cached_data
+
+            if allow_stale:
+                logger.info(f"Stale cache hit for {ticker}, refreshing in background")
+                self._schedule_refresh(ticker)
+                cached_data['source'] = 'cache'
+                return cached_data
+
+        elif self._is_known_missing(ticker):
+            logger.info(f"Negative cache hit for {ticker}")
+            return None
 
-        # Method 3: Last resort - history method
-        if not data:
-            data = self._try_history_method(ticker)
+        data = self._fetch_coalesced(ticker)
 
-        # If we got data from any method, cache it
         if data:
-            cache.set(cache_key, data, self.CACHE_TIMEOUT)
             logger.info(f"Successfully fetched price for {ticker}: ${data['price']}")
             return data
 
         logger.error(f"All methods failed for {ticker}")
         return None
 
-    def _try_download_method(self, ticker):
-        """Try using yf.download method."""
-        try:
-            # Download with minimal output
-            data = yf.download(ticker, period='1d', progress=False, show_errors=False)
+    def get_stock_prices(self, tickers, allow_stale=True):
+        """
+        Get current prices for many tickers with a single upstream call.
 
-            if data.empty:
-                return None
+        Cached tickers are served from the cache; the remaining ones are
+        fetched together with one provider call (a single yf.download for
+        yfinance). Tickers missing from the bulk
+        response fall back to the per-ticker methods.
 
-            # Get latest data
-            latest = data.iloc[-1]
-            price = latest['Close']
-            volume = int(latest['Volume']) if 'Volume' in latest else 0
+        Args:
+            tickers (iterable): Stock ticker symbols
+            allow_stale (bool): See get_stock_price
 
-            # Get company name separately (optional)
-            company_name = ticker  # Default to ticker
-            try:
-                stock = yf.Ticker(ticker)
-                info = stock.fast_info
-                # fast_info doesn't have company name, use ticker
-            except:
-                pass
-
-            return {
-                'price': Decimal(str(price)),
-                'volume': volume,
-                'timestamp': timezone.now(),
-                'company_name': company_name,
-                'exchange': '',
-                'source': 'api'
-            }
-        except Exception as e:
-            logger.debug(f"Download method failed for {ticker}: {str(e)}")
-            return None
+        Returns:
+            dict: {ticker: price data dict (same shape as get_stock_price)}
+            Failed tickers map to None.
+        """
+        tickers = list(dict.fromkeys(t.upper().strip() for t in tickers if t and t.strip()))
+        if not tickers:
+            return {}
+
+        results = {}
+
+        # Check cache per ticker in one round-trip
+        namespaces = self._namespaces()
+        cache_keys = {self._cache_key('price', ticker, namespaces): ticker for ticker in tickers}
+        cached = self.cache.get_many(list(cache_keys))
+        for cache_key, cached_data in cached.items():
+            if not cached_data:
+                continue
+            ticker = cache_keys[cache_key]
+            if not self._is_fresh(cached_data):
+                if not allow_stale:
+                    continue
+                self._schedule_refresh(ticker)
+            cached_data['source'] = 'cache'
+            results[ticker] = cached_data
+
+        # Skip tickers that recently failed
+        missing_keys = {
+            self._cache_key('missing', ticker, namespaces): ticker
+            for ticker in tickers if ticker not in results
+        }
+        known_missing = {missing_keys[key] for key in self.cache.get_many(list(missing_keys))}
+
+        missing = [ticker for ticker in tickers if ticker not in results and ticker not in known_missing]
+        if missing:
+            logger.info(f"Cache hit for {len(results)}/{len(tickers)} tickers, fetching {len(missing)}")
+            bulk_latency = None
+            if self._method_stats['bulk'].is_open():
+                fetched = {}
+            else:
+                started = time.monotonic()
+                fetched = self.provider.get_prices(missing)
+                bulk_latency = time.monotonic() - started
+
+            if fetched:
+                self.cache.set_many(
+                    {self._cache_key('price', ticker, namespaces): data for ticker, data in fetched.items()},
+                    self._cache_timeout()
+                )
+            bulk_found = bool(fetched)
+
+            # Anything the bulk call didn't return goes through the normal chain
+            for ticker in missing:
+                if ticker not in fetched:
+                    data = self._fetch_coalesced(ticker)
+                    if data:
+                        fetched[ticker] = data
+
+            # The bulk call only failed if the per-ticker methods found prices it
+            # didn't; if nothing was found anywhere the tickers are likely invalid
+            if bulk_latency is not None and fetched:
+                self._record_method_result('bulk', bulk_found, bulk_latency)
+
+            results.update(fetched)
+
+            still_missing = [ticker for ticker in missing if ticker not in fetched]
+            if still_missing:
+                self.cache.set_many(
+                    {self._cache_key('missing', ticker, namespaces): True for ticker in still_missing},
+                    self.negative_timeout
+                )
+
+        failed = [ticker for ticker in tickers if ticker not in results]
+        if failed:
+            logger.error(f"All methods failed for {', '.join(failed)}")
+
+        return {ticker: results.get(ticker) for ticker in tickers}
+
+    def _cache_timeout(self):
+        """How long price entries live in the cache backend."""
+        if self.stale_while_revalidate:
+            return max(self.hard_timeout, self.soft_timeout)
+        return self.CACHE_TIMEOUT
+
+    def _namespaces(self):
+        """
+        Current key namespace for each cache category.
+
+        Keys embed a global generation and a per-category generation, so
+        bumping either one invalidates every matching entry at once on any
+        backend. Generations start from the current time, so one that gets
+        evicted from the backend comes back newer rather than reusing an old
+        namespace.
 
-    def _try_history_method(self, ticker):
-        """Try using Ticker.history method."""
+        Returns:
+            dict: {category: key prefix}
+        """
+        generation_keys = {
+            name: f"{self.GENERATION_PREFIX}{name}"
+            for name in ['all'] + list(self.CACHE_PREFIXES)
+        }
+        generations = self.cache.get_many(list(generation_keys.values()))
+
+        for key in generation_keys.values():
+            if key not in generations:
+                initial = int(time.time())
+                self.cache.shared.add(key, initial, None)
+                generations[key] = self.cache.shared.get(key, initial)
+
+        global_generation = generations[generation_keys['all']]
+        return {
+            category: f"{prefix}v{global_generation}.{generations[generation_keys[category]]}_"
+            for category, prefix in self.CACHE_PREFIXES.items()
+        }
+
+    def _cache_key(self, category, ticker, namespaces=None):
+        """Versioned cache key for a ticker in a category."""
+        namespaces = namespaces or self._namespaces()
+        return f"{namespaces[category]}{ticker}"
+
+    def _bump_generation(self, name):
+        """Move a category (or 'all') to a fresh namespace."""
+        key = f"{self.GENERATION_PREFIX}{name}"
+        self.cache.shared.add(key, int(time.time()), None)
+        generation = self.cache.shared.incr(key)
+        # Make other processes drop the old generation from their L1
+        self.cache.invalidate([key])
+        return generation
+
+    def _is_known_missing(self, ticker):
+        """Whether a ticker recently failed pricing or validation."""
+        return self.cache.get(self._cache_key('missing', ticker)) is not None
+
+    def _mark_missing(self, ticker):
+        """Remember a failed ticker for the negative cache timeout."""
+        self.cache.set(self._cache_key('missing', ticker), True, self.negative_timeout)
+
+    def _is_fresh(self, data):
+        """Whether a cached price is still within the soft timeout."""
+        if not self.stale_while_revalidate:
+            return True
+        age = (timezone.now() - data['timestamp']).total_seconds()
+        return age <= self.soft_timeout
+
+    def _schedule_refresh(self, ticker):
+        """Refresh a ticker's cached price on a background worker."""
+        with self._refresh_lock:
+            # Only one background refresh per ticker at a time
+            if ticker in self._refreshing:
+                return
+            self._refreshing.add(ticker)
+
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix='price-refresh'
+                )
+
+        self._refresh_executor.submit(self._refresh_in_background, ticker)
+
+    def _refresh_in_background(self, ticker):
+        """Fetch a ticker and store it in the cache (runs on a worker thread)."""
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period='1d')
-
-            if hist.empty:
-                return None
-
-            latest = hist.iloc[-1]
-            price = latest['Close']
-            volume = int(latest['Volume']) if 'Volume' in latest else 0
-
-            return {
-                'price': Decimal(str(price)),
-                'volume': volume,
-                'timestamp': timezone.now(),
-                'company_name': ticker,
-                'exchange': '',
-                'source': 'api'
-            }
+            data = self._fetch_coalesced(ticker)
+            if data:
+                logger.info(f"Background refresh for {ticker}: ${data['price']}")
+            else:
+                logger.warning(f"Background refresh failed for {ticker}, keeping stale price")
         except Exception as e:
-            logger.debug(f"History method failed for {ticker}: {str(e)}")
+            logger.error(f"Background refresh error for {ticker}: {str(e)}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(ticker)
+
+    def _fetch_coalesced(self, ticker):
+        """
+        Fetch and cache a ticker's price, sharing in-flight fetches.
+
+        Only one thread per process runs the fetch for a given ticker; other
+        callers wait for its result instead of hitting the API themselves.
+        """
+        with self._in_flight_lock:
+            call = self._in_flight.get(ticker)
+            is_leader = call is None
+            if is_leader:
+                call = self._in_flight[ticker] = _InFlightFetch()
+
+        if not is_leader:
+            logger.debug(f"Waiting on in-flight fetch for {ticker}")
+            if call.done.wait(self.fetch_lock_timeout) and call.result:
+                return dict(call.result)
             return None
 
-    def _try_fast_info_method(self, ticker):
-        """Try using Ticker.fast_info (lightweight API) - MOST RELIABLE with yfinance 0.2.66+."""
         try:
-            stock = yf.Ticker(ticker)
-            fast_info = stock.fast_info
-
-            # fast_info has last_price (most reliable in latest version)
-            price = fast_info.last_price
-
-            if not price:
-                return None
-
-            return {
-                'price': Decimal(str(price)),
-                'volume': 0,  # fast_info doesn't always have volume
-                'timestamp': timezone.now(),
-                'company_name': ticker,
-                'exchange': '',
-                'source': 'api'
-            }
-        except Exception as e:
-            logger.debug(f"Fast info method failed for {ticker}: {str(e)}")
-            return None
+            if self.fetch_lock_mode == 'cache':
+                call.result = self._fetch_with_cache_lock(ticker)
+            else:
+                call.result = self._fetch_and_cache(ticker)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(ticker, None)
+            call.done.set()
+
+        return call.result
+
+    def _fetch_with_cache_lock(self, ticker):
+        """Fetch a ticker while holding a lock in the shared cache backend."""
+        lock_key = f"{self.lock_prefix}{ticker}"
+
+        if self.cache.shared.add(lock_key, True, self.fetch_lock_timeout):
+            try:
+                return self._fetch_and_cache(ticker)
+            finally:
+                self.cache.shared.delete(lock_key)
+
+        # Another process is fetching: wait for it to release the lock,
+        # then use whatever it stored
+        deadline = time.monotonic() + self.fetch_lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            if self.cache.shared.get(lock_key) is None:
+                return self.cache.get(self._cache_key('price', ticker))
+
+        logger.warning(f"Timed out waiting for fetch lock on {ticker}")
+        return self._fetch_and_cache(ticker)
+
+    def _fetch_and_cache(self, ticker):
+        """Fetch a ticker's price and store it in the cache."""
+        data = self._fetch_price(ticker)
+        if data:
+            self.cache.set(self._cache_key('price', ticker), data, self._cache_timeout())
+            if self._is_known_missing(ticker):
+                self.cache.delete(self._cache_key('missing', ticker))
+        else:
+            self._mark_missing(ticker)
+        return data
+
+    def _fetch_price(self, ticker):
+        """
+        Fetch a single ticker's price, trying each method in turn.
+
+        Methods are tried cheapest-first according to their recent success
+        rate and latency, skipping any whose circuit breaker is open. A
+        method only counts as failed when a later method found a price, so
+        an invalid ticker doesn't trip the breakers.
+        """
+        failed = []
+        for name, method in self._ordered_methods():
+            started = time.monotonic()
+            data = method(ticker)
+            latency = time.monotonic() - started
+
+            if data:
+                self._record_method_result(name, True, latency)
+                for failed_name, failed_latency in failed:
+                    self._record_method_result(failed_name, False, failed_latency)
+                return data
+
+            failed.append((name, latency))
+
+        return None
+
+    def _ordered_methods(self):
+        """Price methods with closed breakers, best expected cost first."""
+        with self._stats_lock:
+            available = [
+                (index, name, method)
+                for index, (name, method) in enumerate(self.price_methods)
+                if not self._method_stats[name].is_open()
+            ]
+            available.sort(key=lambda item: (self._method_stats[item[1]].score(), item[0]))
+
+        if not available:
+            logger.warning("All price methods have open circuit breakers")
+        return [(name, method) for _, name, method in available]
+
+    def _record_method_result(self, name, success, latency):
+        with self._stats_lock:
+            self._method_stats[name].record(success, latency)
+
+    def get_method_stats(self):
+        """
+        Get per-method fetch statistics.
+
+        Returns:
+            list: One dict per method (success/failure counts, smoothed
+            success rate and latency, breaker state), in the order the
+            methods are currently tried
+        """
+        ordered = [name for name, _ in self._ordered_methods()]
+        with self._stats_lock:
+            names = ['bulk'] + ordered + [
+                name for name, _ in self.price_methods if name not in ordered
+            ]
+            return [self._method_stats[name].as_dict() for name in names]
 
     def get_historical_prices(self, ticker, days=30):
         """
@@ -173,40 +520,7 @@ class StockPriceAdapter:
             list: List of dicts with 'date', 'price', 'volume'
             Returns empty list if fetch fails
         """
-        ticker = ticker.upper().strip()
-
-        try:
-            # Use download method for better reliability
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            data = yf.download(
-                ticker,
-                start=start_date,
-                end=end_date,
-                progress=False,
-                show_errors=False
-            )
-
-            if data.empty:
-                logger.warning(f"No historical data for {ticker}")
-                return []
-
-            # Convert to list of dicts
-            historical_data = []
-            for date, row in data.iterrows():
-                historical_data.append({
-                    'date': date,
-                    'price': Decimal(str(row['Close'])),
-                    'volume': int(row['Volume']) if 'Volume' in row else 0,
-                })
-
-            logger.info(f"Fetched {len(historical_data)} historical prices for {ticker}")
-            return historical_data
-
-        except Exception as e:
-            logger.error(f"Failed to fetch historical data for {ticker}: {str(e)}")
-            return []
+        return self.provider.get_historical_prices(ticker.upper().strip(), days=days)
 
     def validate_ticker(self, ticker):
         """
@@ -220,16 +534,17 @@ class StockPriceAdapter:
         """
         ticker = ticker.upper().strip()
 
-        try:
-            # Try download method - quickest validation
-            data = yf.download(ticker, period='5d', progress=False, show_errors=False)
+        # A cached price proves the ticker is valid; a cached failure that it isn't
+        if self.cache.get(self._cache_key('price', ticker)):
+            return True
+        if self._is_known_missing(ticker):
+            return False
 
-            # Valid if we got any data
-            return not data.empty
+        valid = self.provider.validate_ticker(ticker)
 
-        except Exception as e:
-            logger.error(f"Ticker validation failed for {ticker}: {str(e)}")
-            return False
+        if not valid:
+            self._mark_missing(ticker)
+        return valid
 
     def get_stock_info(self, ticker):
         """
@@ -244,52 +559,41 @@ class StockPriceAdapter:
         """
         ticker = ticker.upper().strip()
 
-        try:
-            stock = yf.Ticker(ticker)
+        cache_key = self._cache_key('info', ticker)
+        info = self.cache.get(cache_key)
+        if info:
+            return info
 
-            # Try to get info, but use basic data if it fails
-            try:
-                info = stock.info
-                return {
-                    'ticker': ticker,
-                    'company_name': info.get('longName', info.get('shortName', ticker)),
-                    'sector': info.get('sector', ''),
-                    'industry': info.get('industry', ''),
-                    'exchange': info.get('exchange', ''),
-                    'currency': info.get('currency', 'USD'),
-                    'market_cap': info.get('marketCap'),
-                }
-            except Exception as info_error:
-                logger.warning(f"Could not fetch full info for {ticker}, using basic data: {str(info_error)}")
-                # Return basic info without requiring info API
-                return {
-                    'ticker': ticker,
-                    'company_name': ticker,
-                    'sector': '',
-                    'industry': '',
-                    'exchange': '',
-                    'currency': 'USD',
-                    'market_cap': None,
-                }
+        info = self.provider.get_stock_info(ticker)
+        if info:
+            self.cache.set(cache_key, info, self.INFO_CACHE_TIMEOUT)
+        return info
 
-        except Exception as e:
-            logger.error(f"Failed to fetch info for {ticker}: {str(e)}")
-            return None
-
-    def clear_cache(self, ticker=None):
+    def clear_cache(self, ticker=None, category=None):
         """
         Clear cached price data.
 
         Args:
             ticker (str, optional): Specific ticker to clear. If None, clears all.
+            category (str, optional): Only clear one category ('price',
+                'missing' or 'info'). If None, clears every category.
+
+        Clearing everything is a generation bump, so it is O(1) on any
+        backend; old entries are simply never read again and expire.
         """
+        if category is not None and category not in self.CACHE_PREFIXES:
+            raise ValueError(f"Unknown cache category: {category}")
+
+        categories = [category] if category else list(self.CACHE_PREFIXES)
+
         if ticker:
-            cache_key = f"{self.cache_prefix}{ticker.upper()}"
-            cache.delete(cache_key)
+            ticker = ticker.upper()
+            namespaces = self._namespaces()
+            self.cache.delete_many([self._cache_key(name, ticker, namespaces) for name in categories])
             logger.info(f"Cleared cache for {ticker}")
         else:
-            # This would require a cache backend that supports pattern deletion
-            logger.info("Clear all cache not implemented for this backend")
+            generation = self._bump_generation(category or 'all')
+            logger.info(f"Cleared {category or 'all'} cache (generation {generation})")
 
 
 # Singleton instance
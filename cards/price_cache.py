@@ -0,0 +1,196 @@
+"""
+Two-tier cache for stock price data.
+
+L1 is a small in-process LRU with a short per-entry TTL, so hot tickers are
+served without touching any backend. L2 is a shared Django cache backend
+(file-based by default, see settings.CACHES['prices']) so all gunicorn
+workers on a box share fetched prices.
+
+Deletes are published to an invalidation log in L2; each process replays
+the log at most every ``sync_interval`` seconds and evicts the affected L1
+entries, so a clear_cache() in one worker reaches the others' L1 quickly.
+The L1 TTL bounds staleness if an invalidation is ever missed.
+"""
+
+from collections import OrderedDict
+from django.core.cache import caches
+import copy
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRUCache:
+    """Thread-safe in-process LRU cache with a TTL per entry."""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """
+    In-process L1 in front of a shared L2 Django cache backend.
+
+    Supports the subset of the Django cache API used by StockPriceAdapter.
+    Values are shallow-copied on the way out of L1 so callers can't mutate
+    the cached object. Use ``shared`` directly for entries that must never
+    be served from L1 (e.g. locks).
+    """
+
+    INVALIDATION_SEQ_KEY = 'price_cache_invalidation_seq'
+    INVALIDATION_LOG_PREFIX = 'price_cache_invalidation_'
+    INVALIDATION_LOG_TIMEOUT = 60 * 60
+
+    def __init__(self, backend='default', l1_max_entries=1000, l1_timeout=30, sync_interval=5):
+        self.shared = caches[backend]
+        self.local = LocalLRUCache(max_entries=l1_max_entries)
+        self.l1_timeout = l1_timeout
+        self.sync_interval = sync_interval
+
+        self._seen_seq = None
+        self._next_sync = 0
+        self._sync_lock = threading.Lock()
+
+    def get(self, key, default=None):
+        self._sync()
+
+        value = self.local.get(key)
+        if value is not None:
+            return copy.copy(value)
+
+        value = self.shared.get(key)
+        if value is None:
+            return default
+
+        self.local.set(key, value, self.l1_timeout)
+        return copy.copy(value)
+
+    def get_many(self, keys):
+        self._sync()
+
+        found = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = copy.copy(value)
+            else:
+                remote_keys.append(key)
+
+        if remote_keys:
+            for key, value in self.shared.get_many(remote_keys).items():
+                self.local.set(key, value, self.l1_timeout)
+                found[key] = copy.copy(value)
+
+        return found
+
+    def set(self, key, value, timeout):
+        self.shared.set(key, value, timeout)
+        self.local.set(key, value, min(timeout, self.l1_timeout))
+
+    def set_many(self, data, timeout):
+        self.shared.set_many(data, timeout)
+        for key, value in data.items():
+            self.local.set(key, value, min(timeout, self.l1_timeout))
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        """Delete keys from both tiers and tell other processes to drop them."""
+        keys = list(keys)
+        self.shared.delete_many(keys)
+        for key in keys:
+            self.local.delete(key)
+        self._publish_invalidation(keys)
+
+    def invalidate(self, keys):
+        """Drop keys from every process's L1 without touching L2."""
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+        self._publish_invalidation(keys)
+
+    def _publish_invalidation(self, keys):
+        """Append deleted keys to the shared invalidation log."""
+        try:
+            self.shared.add(self.INVALIDATION_SEQ_KEY, 0, None)
+            # Retry if another process claimed the same sequence number
+            for _ in range(5):
+                seq = self.shared.incr(self.INVALIDATION_SEQ_KEY)
+                if self.shared.add(f"{self.INVALIDATION_LOG_PREFIX}{seq}", keys, self.INVALIDATION_LOG_TIMEOUT):
+                    return
+        except ValueError:
+            pass
+        logger.warning("Could not publish price cache invalidation, relying on L1 expiry")
+
+    def _sync(self):
+        """Evict L1 entries deleted by other processes since the last sync."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+
+        with self._sync_lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+
+            current = self.shared.get(self.INVALIDATION_SEQ_KEY, 0)
+            if self._seen_seq is None or current < self._seen_seq:
+                # First sync, or the log was reset: start from a clean L1
+                if self._seen_seq is not None:
+                    self.local.clear()
+                self._seen_seq = current
+                return
+
+            if current == self._seen_seq:
+                return
+
+            log_keys = [
+                f"{self.INVALIDATION_LOG_PREFIX}{seq}"
+                for seq in range(self._seen_seq + 1, current + 1)
+            ]
+            entries = self.shared.get_many(log_keys) if len(log_keys) <= 1000 else {}
+
+            if len(entries) < len(log_keys):
+                # Part of the log expired or we fell too far behind
+                self.local.clear()
+            else:
+                for keys in entries.values():
+                    for key in keys:
+                        self.local.delete(key)
+
+            self._seen_seq = current
@@ -0,0 +1,206 @@
+"""
+Retention tiers for the shared price series.
+
+Raw StockPrice rows older than the raw retention are rolled into daily OHLC
+bars and deleted; daily bars older than the daily retention are rolled into
+weekly bars and deleted. Only whole days and weeks past the cutoff are
+compacted, and work is done in batches, each in its own transaction, so the
+job can run against a live database and be interrupted safely.
+
+Readers (StockCard.get_price_history, price change lookups and the
+latest-price backfill) fall back to the bars where raw prices are gone.
+Manual PriceSnapshots are per card and few, so they are kept as-is.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import logging
+import operator
+
+from .models import PriceBar, StockPrice
+
+logger = logging.getLogger(__name__)
+
+# Number of rows compacted and deleted per transaction
+BATCH_SIZE = 5000
+
+
+def period_start(when, period):
+    """
+    Start of the day or week (Monday) containing ``when``, in local time.
+
+    Args:
+        when (datetime): Aware datetime
+        period (str): 'day' or 'week'
+
+    Returns:
+        datetime: Aware datetime at local midnight
+    """
+    start = timezone.localtime(when).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def _merge_bars(period, items):
+    """
+    Merge OHLC items into bars, creating or extending existing ones.
+
+    A raw price's volume is the day's running total at that time, so a
+    daily bar keeps the largest volume of its prices (the day's total so
+    far) while a weekly bar adds up the volumes of its days.
+
+    Args:
+        period (str): Bar period to write
+        items (list): (stock_id, opened_at, open, high, low, closed_at, close, volume)
+            tuples, in any order
+
+    Returns:
+        int: Number of bars created or updated
+    """
+    merge_volume = max if period == 'day' else operator.add
+
+    merged = {}
+    for stock_id, opened_at, open_, high, low, closed_at, close, volume in items:
+        key = (stock_id, period_start(opened_at, period))
+        bar = merged.get(key)
+        if bar is None:
+            merged[key] = PriceBar(
+                stock_id=stock_id, period=period, start=key[1],
+                open=open_, high=high, low=low, close=close, volume=volume or 0,
+                opened_at=opened_at, timestamp=closed_at,
+            )
+            continue
+
+        if opened_at < bar.opened_at:
+            bar.open, bar.opened_at = open_, opened_at
+        if closed_at > bar.timestamp:
+            bar.close, bar.timestamp = close, closed_at
+        bar.high = max(bar.high, high)
+        bar.low = min(bar.low, low)
+        bar.volume = merge_volume(bar.volume, volume or 0)
+
+    # Fold in bars written by earlier batches or runs
+    existing = PriceBar.objects.filter(
+        period=period,
+        stock_id__in={stock_id for stock_id, _ in merged},
+        start__in={start for _, start in merged},
+    )
+    to_update = []
+    for bar in existing:
+        new = merged.pop((bar.stock_id, bar.start), None)
+        if new is None:
+            continue
+        if new.opened_at < bar.opened_at:
+            bar.open, bar.opened_at = new.open, new.opened_at
+        if new.timestamp > bar.timestamp:
+            bar.close, bar.timestamp = new.close, new.timestamp
+        bar.high = max(bar.high, new.high)
+        bar.low = min(bar.low, new.low)
+        bar.volume = merge_volume(bar.volume, new.volume)
+        to_update.append(bar)
+
+    PriceBar.objects.bulk_create(merged.values())
+    PriceBar.objects.bulk_update(
+        to_update, ['open', 'opened_at', 'high', 'low', 'close', 'timestamp', 'volume']
+    )
+    return len(merged) + len(to_update)
+
+
+def compact_raw_prices(older_than, batch_size=BATCH_SIZE):
+    """
+    Roll raw StockPrice rows before the start of ``older_than``'s day into daily bars.
+
+    Args:
+        older_than (datetime): Rows before the day containing this are compacted
+        batch_size (int): Rows compacted and deleted per transaction
+
+    Returns:
+        dict: {'rows': raw rows deleted, 'bars': daily bars written}
+    """
+    cutoff = period_start(older_than, 'day')
+    summary = {'rows': 0, 'bars': 0}
+
+    while True:
+        with transaction.atomic():
+            rows = list(
+                StockPrice.objects.filter(timestamp__lt=cutoff)
+                .order_by('stock_id', 'timestamp')
+                .values_list('pk', 'stock_id', 'timestamp', 'price', 'volume')[:batch_size]
+            )
+            if not rows:
+                break
+
+            summary['bars'] += _merge_bars('day', [
+                (stock_id, timestamp, price, price, price, timestamp, price, volume)
+                for _, stock_id, timestamp, price, volume in rows
+            ])
+            StockPrice.objects.filter(pk__in=[row[0] for row in rows]).delete()
+            summary['rows'] += len(rows)
+
+        logger.info(f"Compacted {summary['rows']} raw prices into daily bars...")
+
+    return summary
+
+
+def compact_daily_bars(older_than, batch_size=BATCH_SIZE):
+    """
+    Roll daily bars before the start of ``older_than``'s week into weekly bars.
+
+    Args:
+        older_than (datetime): Bars before the week containing this are compacted
+        batch_size (int): Bars compacted and deleted per transaction
+
+    Returns:
+        dict: {'rows': daily bars deleted, 'bars': weekly bars written}
+    """
+    cutoff = period_start(older_than, 'week')
+    summary = {'rows': 0, 'bars': 0}
+
+    while True:
+        with transaction.atomic():
+            bars = list(
+                PriceBar.objects.filter(period='day', start__lt=cutoff)
+                .order_by('stock_id', 'start')[:batch_size]
+            )
+            if not bars:
+                break
+
+            summary['bars'] += _merge_bars('week', [
+                (bar.stock_id, bar.opened_at, bar.open, bar.high, bar.low, bar.timestamp, bar.close, bar.volume)
+                for bar in bars
+            ])
+            PriceBar.objects.filter(pk__in=[bar.pk for bar in bars]).delete()
+            summary['rows'] += len(bars)
+
+        logger.info(f"Compacted {summary['rows']} daily bars into weekly bars...")
+
+    return summary
+
+
+def compact_prices(raw_days=None, daily_days=None, batch_size=BATCH_SIZE):
+    """
+    Apply both retention tiers.
+
+    Args:
+        raw_days (int, optional): Raw retention in days
+            (default: settings.PRICE_RAW_RETENTION_DAYS)
+        daily_days (int, optional): Daily bar retention in days
+            (default: settings.PRICE_DAILY_RETENTION_DAYS)
+        batch_size (int): Rows compacted and deleted per transaction
+
+    Returns:
+        dict: {'daily': compact_raw_prices summary, 'weekly': compact_daily_bars summary}
+    """
+    if raw_days is None:
+        raw_days = settings.PRICE_RAW_RETENTION_DAYS
+    if daily_days is None:
+        daily_days = settings.PRICE_DAILY_RETENTION_DAYS
+
+    now = timezone.now()
+    return {
+        'daily': compact_raw_prices(now - timedelta(days=raw_days), batch_size=batch_size),
+        'weekly': compact_daily_bars(now - timedelta(days=daily_days), batch_size=batch_size),
+    }
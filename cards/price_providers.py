@@ -0,0 +1,508 @@
+"""
+Price data providers used by StockPriceAdapter.
+
+A provider is the only code that talks to an upstream quote source. The
+adapter adds caching, request coalescing, method ordering and circuit
+breakers on top of whichever provider settings.PRICE_PROVIDER selects:
+
+    'yfinance' - live prices from Yahoo Finance (default)
+    'replay'   - recorded/synthetic quotes from a local file, for offline
+                 benchmarking and load testing
+"""
+
+import yfinance as yf
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from decimal import Decimal
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PriceProvider:
+    """
+    Interface for upstream price sources.
+
+    Tickers passed in are already upper-cased and stripped. Methods return
+    None/empty results on failure instead of raising. Price data dicts have
+    the shape documented on StockPriceAdapter.get_stock_price.
+    """
+
+    name = 'base'
+
+    def get_price_methods(self):
+        """
+        Get the single-ticker price methods, in default fallback order.
+
+        Returns:
+            list: (name, callable) pairs; each callable takes a ticker and
+            returns a price data dict or None
+        """
+        raise NotImplementedError
+
+    def get_prices(self, tickers):
+        """
+        Fetch prices for many tickers in one upstream call.
+
+        Returns:
+            dict: {ticker: price data dict} for the tickers that were found
+        """
+        return {}
+
+    def get_historical_prices(self, ticker, days=30):
+        """Get a list of {'date', 'price', 'volume'} dicts, or []."""
+        raise NotImplementedError
+
+    def validate_ticker(self, ticker):
+        """Check whether the upstream source knows the ticker."""
+        raise NotImplementedError
+
+    def get_stock_info(self, ticker):
+        """Get company information for a ticker, or None."""
+        raise NotImplementedError
+
+
+class YFinanceProvider(PriceProvider):
+    """Live prices from Yahoo Finance via yfinance."""
+
+    name = 'yfinance'
+
+    def get_price_methods(self):
+        return [
+            ('fast_info', self._try_fast_info_method),
+            ('download', self._try_download_method),
+            ('history', self._try_history_method),
+        ]
+
+    def get_prices(self, tickers):
+        """Try fetching several tickers with one yf.download call."""
+        try:
+            data = yf.download(
+                tickers,
+                period='1d',
+                group_by='ticker',
+                auto_adjust=True,
+                progress=False,
+                threads=True
+            )
+
+            if data is None or data.empty:
+                return {}
+
+            results = {}
+            grouped = getattr(data.columns, 'nlevels', 1) > 1
+            available = set(data.columns.get_level_values(0)) if grouped else set()
+
+            for ticker in tickers:
+                if grouped:
+                    if ticker not in available:
+                        continue
+                    frame = data[ticker]
+                elif len(tickers) == 1:
+                    frame = data
+                else:
+                    continue
+
+                frame = frame.dropna(subset=['Close'])
+                if frame.empty:
+                    continue
+
+                latest = frame.iloc[-1]
+                volume = latest['Volume'] if 'Volume' in latest else 0
+
+                results[ticker] = {
+                    'price': Decimal(str(latest['Close'])),
+                    'volume': int(volume) if volume == volume else 0,  # NaN check
+                    'timestamp': timezone.now(),
+                    'company_name': ticker,
+                    'exchange': '',
+                    'source': 'api'
+                }
+
+            return results
+        except Exception as e:
+            logger.debug(f"Bulk download method failed for {', '.join(tickers)}: {str(e)}")
+            return {}
+
+    def _try_download_method(self, ticker):
+        """Try using yf.download method."""
+        try:
+            # Download with minimal output
+            data = yf.download(ticker, period='1d', progress=False, show_errors=False)
+
+            if data.empty:
+                return None
+
+            # Get latest data
+            latest = data.iloc[-1]
+            price = latest['Close']
+            volume = int(latest['Volume']) if 'Volume' in latest else 0
+
+            # Get company name separately (optional)
+            company_name = ticker  # Default to ticker
+            try:
+                stock = yf.Ticker(ticker)
+                info = stock.fast_info
+                # fast_info doesn't have company name, use ticker
+            except:
+                pass
+
+            return {
+                'price': Decimal(str(price)),
+                'volume': volume,
+                'timestamp': timezone.now(),
+                'company_name': company_name,
+                'exchange': '',
+                'source': 'api'
+            }
+        except Exception as e:
+            logger.debug(f"Download method failed for {ticker}: {str(e)}")
+            return None
+
+    def _try_history_method(self, ticker):
+        """Try using Ticker.history method."""
+        try:
+            stock = yf.Ticker(ticker)
+            hist = stock.history(period='1d')
+
+            if hist.empty:
+                return None
+
+            latest = hist.iloc[-1]
+            price = latest['Close']
+            volume = int(latest['Volume']) if 'Volume' in latest else 0
+
+            return {
+                'price': Decimal(str(price)),
+                'volume': volume,
+                'timestamp': timezone.now(),
+                'company_name': ticker,
+                'exchange': '',
+                'source': 'api'
+            }
+        except Exception as e:
+            logger.debug(f"History method failed for {ticker}: {str(e)}")
+            return None
+
+    def _try_fast_info_method(self, ticker):
+        """Try using Ticker.fast_info (lightweight API) - MOST RELIABLE with yfinance 0.2.66+."""
+        try:
+            stock = yf.Ticker(ticker)
+            fast_info = stock.fast_info
+
+            # fast_info has last_price (most reliable in latest version)
+            price = fast_info.last_price
+
+            if not price:
+                return None
+
+            return {
+                'price': Decimal(str(price)),
+                'volume': 0,  # fast_info doesn't always have volume
+                'timestamp': timezone.now(),
+                'company_name': ticker,
+                'exchange': '',
+                'source': 'api'
+            }
+        except Exception as e:
+            logger.debug(f"Fast info method failed for {ticker}: {str(e)}")
+            return None
+
+    def get_historical_prices(self, ticker, days=30):
+        """
+        Get historical price data for a ticker.
+
+        Args:
+            ticker (str): Stock ticker symbol
+            days (int): Number of days of history to fetch
+
+        Returns:
+            list: List of dicts with 'date', 'price', 'volume'
+            Returns empty list if fetch fails
+        """
+        try:
+            # Use download method for better reliability
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=days)
+
+            data = yf.download(
+                ticker,
+                start=start_date,
+                end=end_date,
+                progress=False,
+                show_errors=False
+            )
+
+            if data.empty:
+                logger.warning(f"No historical data for {ticker}")
+                return []
+
+            # Convert to list of dicts
+            historical_data = []
+            for date, row in data.iterrows():
+                historical_data.append({
+                    'date': date,
+                    'price': Decimal(str(row['Close'])),
+                    'volume': int(row['Volume']) if 'Volume' in row else 0,
+                })
+
+            logger.info(f"Fetched {len(historical_data)} historical prices for {ticker}")
+            return historical_data
+
+        except Exception as e:
+            logger.error(f"Failed to fetch historical data for {ticker}: {str(e)}")
+            return []
+
+    def validate_ticker(self, ticker):
+        try:
+            # Try download method - quickest validation
+            data = yf.download(ticker, period='5d', progress=False, show_errors=False)
+
+            # Valid if we got any data
+            return not data.empty
+
+        except Exception as e:
+            logger.error(f"Ticker validation failed for {ticker}: {str(e)}")
+            return False
+
+    def get_stock_info(self, ticker):
+        """
+        Get comprehensive stock information.
+
+        Args:
+            ticker (str): Stock ticker symbol
+
+        Returns:
+            dict: Stock information including company name, sector, etc.
+            Returns None if fetch fails
+        """
+        try:
+            stock = yf.Ticker(ticker)
+
+            # Try to get info, but use basic data if it fails
+            try:
+                info = stock.info
+                return {
+                    'ticker': ticker,
+                    'company_name': info.get('longName', info.get('shortName', ticker)),
+                    'sector': info.get('sector', ''),
+                    'industry': info.get('industry', ''),
+                    'exchange': info.get('exchange', ''),
+                    'currency': info.get('currency', 'USD'),
+                    'market_cap': info.get('marketCap'),
+                }
+            except Exception as info_error:
+                logger.warning(f"Could not fetch full info for {ticker}, using basic data: {str(info_error)}")
+                # Return basic info without requiring info API
+                return {
+                    'ticker': ticker,
+                    'company_name': ticker,
+                    'sector': '',
+                    'industry': '',
+                    'exchange': '',
+                    'currency': 'USD',
+                    'market_cap': None,
+                }
+
+        except Exception as e:
+            logger.error(f"Failed to fetch info for {ticker}: {str(e)}")
+            return None
+
+
+class ReplayProvider(PriceProvider):
+    """
+    Offline provider that replays quotes recorded in a local JSON file.
+
+    File format::
+
+        {
+            "quotes": {
+                "AAPL": [{"price": "189.84", "volume": 51234567}, ...],
+                "MSFT": {"price": "415.10", "volume": 20123456}
+            },
+            "history": {
+                "AAPL": [{"date": "2025-01-02", "price": "185.64", "volume": 1000}, ...]
+            },
+            "info": {
+                "AAPL": {"company_name": "Apple Inc.", "exchange": "NASDAQ", ...}
+            }
+        }
+
+    A list of quotes is replayed in order (wrapping around) on successive
+    calls. Tickers missing from the file get a deterministic synthetic
+    random walk when ``synthetic`` is on, and are unknown otherwise.
+
+    ``latency`` (seconds, with up to ``jitter`` extra) is slept on every
+    upstream call and ``failure_rate`` is the probability that a call fails,
+    so refresh and dashboard throughput can be measured without a network.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path=None, latency=0.0, jitter=0.0, failure_rate=0.0, synthetic=True, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.synthetic = synthetic
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._positions = {}
+
+        recorded = {}
+        if path:
+            with open(path) as f:
+                recorded = json.load(f)
+            logger.info(f"Loaded replay quotes for {len(recorded.get('quotes', {}))} tickers from {path}")
+
+        self.quotes = {
+            ticker.upper(): quotes if isinstance(quotes, list) else [quotes]
+            for ticker, quotes in recorded.get('quotes', {}).items()
+        }
+        self.history = {ticker.upper(): rows for ticker, rows in recorded.get('history', {}).items()}
+        self.info = {ticker.upper(): info for ticker, info in recorded.get('info', {}).items()}
+
+    def get_price_methods(self):
+        return [('replay', self._replay_price)]
+
+    def get_prices(self, tickers):
+        if not self._simulate_call():
+            return {}
+        results = {}
+        for ticker in tickers:
+            quote = self._next_quote(ticker)
+            if quote:
+                results[ticker] = quote
+        return results
+
+    def get_historical_prices(self, ticker, days=30):
+        if not self._simulate_call():
+            return []
+
+        if ticker in self.history:
+            cutoff = (timezone.now() - timedelta(days=days)).date()
+            rows = [
+                {
+                    'date': datetime.fromisoformat(row['date']),
+                    'price': Decimal(str(row['price'])),
+                    'volume': int(row.get('volume') or 0),
+                }
+                for row in self.history[ticker]
+            ]
+            return [row for row in rows if row['date'].date() >= cutoff]
+
+        if not self.synthetic:
+            return []
+
+        today = timezone.now().date()
+        return [
+            {
+                'date': datetime.combine(today - timedelta(days=offset), datetime.min.time()),
+                'price': self._synthetic_price(ticker, -offset),
+                'volume': self._synthetic_volume(ticker, -offset),
+            }
+            for offset in range(days, -1, -1)
+        ]
+
+    def validate_ticker(self, ticker):
+        if not self._simulate_call():
+            return False
+        return self._knows(ticker)
+
+    def get_stock_info(self, ticker):
+        if not self._simulate_call() or not self._knows(ticker):
+            return None
+
+        info = self.info.get(ticker, {})
+        return {
+            'ticker': ticker,
+            'company_name': info.get('company_name', ticker),
+            'sector': info.get('sector', ''),
+            'industry': info.get('industry', ''),
+            'exchange': info.get('exchange', ''),
+            'currency': info.get('currency', 'USD'),
+            'market_cap': info.get('market_cap'),
+        }
+
+    def _replay_price(self, ticker):
+        if not self._simulate_call():
+            return None
+        return self._next_quote(ticker)
+
+    def _simulate_call(self):
+        """Sleep for the configured latency; return False for an injected failure."""
+        delay = self.latency
+        with self._lock:
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        return not failed
+
+    def _knows(self, ticker):
+        return ticker in self.quotes or ticker in self.history or self.synthetic
+
+    def _next_quote(self, ticker):
+        """Next recorded quote for a ticker (or a synthetic one)."""
+        with self._lock:
+            position = self._positions.get(ticker, 0)
+            self._positions[ticker] = position + 1
+
+        if ticker in self.quotes:
+            quote = self.quotes[ticker][position % len(self.quotes[ticker])]
+            price = Decimal(str(quote['price']))
+            volume = int(quote.get('volume') or 0)
+        elif self.synthetic:
+            price = self._synthetic_price(ticker, position)
+            volume = self._synthetic_volume(ticker, position)
+        else:
+            return None
+
+        info = self.info.get(ticker, {})
+        return {
+            'price': price,
+            'volume': volume,
+            'timestamp': timezone.now(),
+            'company_name': info.get('company_name', ticker),
+            'exchange': info.get('exchange', ''),
+            'source': 'api'
+        }
+
+    def _synthetic_price(self, ticker, step):
+        """Deterministic random walk around a per-ticker base price."""
+        seed = int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16)
+        base = 20 + seed % 480
+        walk = random.Random(seed + step).uniform(-0.03, 0.03)
+        return Decimal(str(round(base * (1 + walk), 2)))
+
+    def _synthetic_volume(self, ticker, step):
+        seed = int(hashlib.md5(ticker.encode()).hexdigest()[:8], 16)
+        return random.Random(seed * 31 + step).randint(100_000, 50_000_000)
+
+
+PROVIDERS = {
+    'yfinance': YFinanceProvider,
+    'replay': ReplayProvider,
+}
+
+
+def get_price_provider():
+    """
+    Build the provider configured in settings.
+
+    PRICE_PROVIDER is either a key of PROVIDERS or a dotted path to a
+    PriceProvider subclass; PRICE_PROVIDER_OPTIONS are passed to it as
+    keyword arguments.
+    """
+    name = getattr(settings, 'PRICE_PROVIDER', 'yfinance')
+    options = getattr(settings, 'PRICE_PROVIDER_OPTIONS', {})
+
+    provider_class = PROVIDERS.get(name) or import_string(name)
+    return provider_class(**options)
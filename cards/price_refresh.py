@@ -0,0 +1,253 @@
+"""
+Price refresh pipeline keyed on Stock.
+
+Each distinct ticker is fetched once per run and stored once in the shared
+StockPrice series that every card watching the stock reads, so upstream
+calls and database writes scale with the number of distinct tickers rather
+than with the number of cards.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+import logging
+import time
+
+from .models import Stock, StockCard, StockPrice
+from .price_adapter import price_adapter
+
+logger = logging.getLogger(__name__)
+
+# Number of stocks fetched and written per batch
+BATCH_SIZE = 100
+
+# How often (in seconds) the concurrent mode checks for timed-out fetches
+POLL_INTERVAL = 0.5
+
+
+def fetch_prices(tickers, workers=1, timeout=30, progress=None):
+    """
+    Fetch prices for a list of distinct tickers.
+
+    With a single worker the tickers are fetched together through
+    price_adapter.get_stock_prices (one upstream call). With more workers
+    each ticker is fetched on a bounded thread pool; a fetch running longer
+    than ``timeout`` seconds is abandoned and reported as timed out (the
+    worker thread finishes in the background).
+
+    Args:
+        tickers (list): Ticker symbols to fetch
+        workers (int): Maximum number of concurrent fetches
+        timeout (float): Per-ticker timeout in seconds (concurrent mode only)
+        progress (callable, optional): Called as progress(ticker, status)
+            with status 'ok', 'failed' or 'timeout'
+
+    Returns:
+        tuple: (prices, timed_out) where prices maps every ticker that
+        completed to its price data (None on failure) and timed_out lists
+        the abandoned tickers
+    """
+    if workers <= 1:
+        prices = price_adapter.get_stock_prices(tickers, allow_stale=False)
+        if progress:
+            for ticker, data in prices.items():
+                progress(ticker, 'ok' if data else 'failed')
+        return prices, []
+
+    prices = {}
+    timed_out = []
+    fetch_started = {}
+
+    def fetch(ticker):
+        fetch_started[ticker] = time.monotonic()
+        return price_adapter.get_stock_price(ticker, allow_stale=False)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {executor.submit(fetch, ticker): ticker for ticker in tickers}
+
+        while pending:
+            done, _ = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    prices[ticker] = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching {ticker}: {str(e)}")
+                    prices[ticker] = None
+                if progress:
+                    progress(ticker, 'ok' if prices[ticker] else 'failed')
+
+            # Abandon fetches that have been running for too long
+            now = time.monotonic()
+            for future, ticker in list(pending.items()):
+                fetch_start = fetch_started.get(ticker)
+                if fetch_start is not None and now - fetch_start > timeout:
+                    del pending[future]
+                    timed_out.append(ticker)
+                    if progress:
+                        progress(ticker, 'timeout')
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return prices, timed_out
+
+
+def _is_unchanged(data, stored_price, stored_volume):
+    """Whether fetched price data matches the stored price and volume within tolerance."""
+    tolerance = settings.PRICE_UNCHANGED_TOLERANCE
+    price, volume = float(data['price']), data.get('volume') or 0
+    stored_price, stored_volume = float(stored_price), stored_volume or 0
+
+    if abs(price - stored_price) > tolerance * max(abs(stored_price), 1e-9):
+        return False
+    return abs(volume - stored_volume) <= tolerance * max(stored_volume, 1)
+
+
+def save_stock_prices(stock_prices):
+    """
+    Write one shared StockPrice row per refreshed stock.
+
+    The rows, the stocks' last_checked_at and the denormalized latest price
+    of every card watching the stocks are written in one transaction. A
+    price is only stored if it is newer than the stock's latest stored
+    price, and, with PRICE_SKIP_UNCHANGED, only if it differs from it or
+    the latest row is older than PRICE_HEARTBEAT_INTERVAL. Cards on the
+    stocks that have no latest price yet (e.g. a new card on a stock that
+    was already priced) get it from the stored series even when no row is
+    written, and the stored 1/7/30-day changes of every card on the stocks
+    are recomputed, since their periods move on even when the price
+    doesn't.
+
+    Args:
+        stock_prices (dict): {stock_id: price data dict}
+
+    Returns:
+        int: Number of rows written
+    """
+    if not stock_prices:
+        return 0
+
+    stored = StockPrice.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    latest_stored = {
+        row['id']: row
+        for row in Stock.objects.filter(pk__in=stock_prices.keys()).annotate(
+            latest_at=Subquery(stored.values('timestamp')[:1]),
+            latest_price=Subquery(stored.values('price')[:1]),
+            latest_volume=Subquery(stored.values('volume')[:1]),
+        ).filter(latest_at__isnull=False).values('id', 'latest_at', 'latest_price', 'latest_volume')
+    }
+
+    now = timezone.now()
+    heartbeat = timezone.timedelta(seconds=settings.PRICE_HEARTBEAT_INTERVAL)
+    rows = []
+    for stock_id, data in stock_prices.items():
+        timestamp = data.get('timestamp') or now
+        latest = latest_stored.get(stock_id)
+        if latest is not None:
+            if timestamp <= latest['latest_at']:
+                continue
+            if (
+                settings.PRICE_SKIP_UNCHANGED
+                and timestamp - latest['latest_at'] < heartbeat
+                and _is_unchanged(data, latest['latest_price'], latest['latest_volume'])
+            ):
+                continue
+        rows.append(StockPrice(
+            stock_id=stock_id,
+            price=data['price'],
+            volume=data.get('volume', 0),
+            timestamp=timestamp,
+            source='api'
+        ))
+
+    with transaction.atomic():
+        Stock.objects.filter(pk__in=stock_prices.keys()).update(last_checked_at=now)
+        StockPrice.objects.bulk_create(rows)
+        StockCard.update_latest_prices(rows)
+
+        unpriced = list(StockCard.objects.filter(
+            stock_id__in=stock_prices.keys(), last_price__isnull=True
+        ).values_list('pk', flat=True))
+        if unpriced:
+            StockCard.backfill_latest_prices(StockCard.objects.filter(pk__in=unpriced))
+
+        # Cards on stocks with a new row were recomputed by update_latest_prices
+        written = {row.stock_id for row in rows}
+        unwritten = [stock_id for stock_id in stock_prices if stock_id not in written]
+        if unwritten:
+            StockCard.update_price_changes(StockCard.objects.filter(stock_id__in=unwritten))
+    return len(rows)
+
+
+def refresh_stocks(stocks=None, workers=1, timeout=30, batch_size=BATCH_SIZE, progress=None):
+    """
+    Refresh prices for each distinct stock once and store them.
+
+    Args:
+        stocks (queryset, optional): Stocks to refresh. Defaults to every
+            stock with at least one non-archived card.
+        workers (int): Maximum number of concurrent fetches
+        timeout (float): Per-ticker timeout in seconds (concurrent mode only)
+        batch_size (int): Stocks fetched and written per batch
+        progress (callable, optional): See fetch_prices
+
+    Returns:
+        dict: Run summary with 'stocks', 'succeeded', 'failed', 'timed_out'
+        (lists of tickers), 'prices' (rows written) and 'elapsed' (seconds)
+    """
+    if stocks is None:
+        stocks = Stock.objects.filter(cards__is_archived=False).distinct()
+
+    started = time.monotonic()
+    stock_ids = dict(stocks.order_by().values_list('ticker', 'id'))
+    tickers = sorted(stock_ids)
+
+    summary = {
+        'stocks': len(tickers),
+        'succeeded': [],
+        'failed': [],
+        'timed_out': [],
+        'prices': 0,
+    }
+
+    for start in range(0, len(tickers), batch_size):
+        batch = tickers[start:start + batch_size]
+        prices, timed_out = fetch_prices(batch, workers=workers, timeout=timeout, progress=progress)
+
+        stock_prices = {}
+        for ticker, data in prices.items():
+            if data:
+                stock_prices[stock_ids[ticker]] = data
+                summary['succeeded'].append(ticker)
+            else:
+                summary['failed'].append(ticker)
+        summary['timed_out'].extend(timed_out)
+
+        summary['prices'] += save_stock_prices(stock_prices)
+
+    summary['elapsed'] = time.monotonic() - started
+    logger.info(
+        f"Refreshed {len(summary['succeeded'])}/{summary['stocks']} stocks, "
+        f"wrote {summary['prices']} prices in {summary['elapsed']:.1f}s"
+    )
+    return summary
+
+
+def refresh_stock(stock):
+    """
+    Refresh a single stock for every card watching it.
+
+    Args:
+        stock (Stock): Stock to refresh
+
+    Returns:
+        dict: Price data, or None if the fetch failed
+    """
+    price_data = price_adapter.get_stock_price(stock.ticker, allow_stale=False)
+    if price_data:
+        save_stock_prices({stock.id: price_data})
+    return price_data
@@ -0,0 +1,217 @@
+"""
+Full-text search over stock cards.
+
+Each card has one row in the ``cards_search`` table holding its ticker,
+company name, notes and tag names. A card matches when every search term
+appears somewhere in that text, in the middle of a word as much as at its
+start, and the matching is done by the index:
+
+- SQLite: an FTS5 virtual table (rowid = card id) with the trigram
+  tokenizer, ranked with bm25.
+- PostgreSQL: ILIKE over the raw text, served by its pg_trgm index (which
+  also lets misspellings match), ranked with ts_rank over a weighted
+  tsvector plus trigram similarity.
+
+Trigram lookups need at least three characters, so on SQLite shorter terms
+only narrow down the matches of longer ones; a query made only of short
+terms can't use the index.
+
+The table is created by migrations 0008 and 0013 and kept in sync by the
+signal handlers in cards.signals; rebuild it with
+``python3 manage.py rebuild_search_index``. On other databases (or an
+SQLite build without FTS5 or the trigram tokenizer) is_enabled() is False
+and callers fall back to plain ``icontains`` filtering.
+"""
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+import re
+
+TABLE = 'cards_search'
+
+# Maximum number of ranked card ids returned by search_cards(); further
+# matches are still found (see matching_cards()) but sort after these
+SEARCH_LIMIT = 200
+
+# Terms beyond this are ignored, to bound the cost of a query
+MAX_TERMS = 8
+
+# Shortest term the SQLite trigram index can look up
+MIN_INDEXED_TERM = 3
+
+# Per-column bm25 weights (SQLite): ticker, company name, notes, tags
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0, 3.0)
+
+INDEX_SQL = {
+    'sqlite': (
+        f"INSERT INTO {TABLE} (rowid, ticker, company_name, notes, tags, user_id) "
+        "SELECT c.id, s.ticker, s.company_name, c.notes, "
+        "COALESCE((SELECT group_concat(t.name, ' ') FROM cards_tag t "
+        "JOIN cards_stockcard_tags ct ON ct.tag_id = t.id WHERE ct.stockcard_id = c.id), ''), c.user_id "
+        "FROM cards_stockcard c JOIN cards_stock s ON s.id = c.stock_id"
+    ),
+    'postgresql': (
+        f"INSERT INTO {TABLE} (card_id, user_id, body, document) "
+        "SELECT c.id, c.user_id, concat_ws(' ', s.ticker, s.company_name, c.notes, tags.names), "
+        "setweight(to_tsvector('simple', s.ticker), 'A') || "
+        "setweight(to_tsvector('simple', s.company_name), 'B') || "
+        "setweight(to_tsvector('simple', tags.names), 'B') || "
+        "setweight(to_tsvector('simple', c.notes), 'C') "
+        "FROM cards_stockcard c JOIN cards_stock s ON s.id = c.stock_id, "
+        "LATERAL (SELECT COALESCE(string_agg(t.name, ' '), '') AS names FROM cards_tag t "
+        "JOIN cards_stockcard_tags ct ON ct.tag_id = t.id WHERE ct.stockcard_id = c.id) tags"
+    ),
+}
+
+_ROW_KEY = {'sqlite': 'rowid', 'postgresql': 'card_id'}
+
+_enabled = None
+
+
+def is_enabled():
+    """Whether the search table exists on the default database."""
+    global _enabled
+    if _enabled is None:
+        _enabled = (
+            connection.vendor in INDEX_SQL
+            and TABLE in connection.introspection.table_names(include_views=True)
+        )
+    return _enabled
+
+
+def index_cards(card_ids):
+    """
+    (Re)index the given cards with one DELETE and one INSERT ... SELECT.
+
+    Ids of cards that no longer exist are simply removed from the index.
+
+    Args:
+        card_ids (iterable): StockCard primary keys
+    """
+    card_ids = list(card_ids)
+    if not card_ids or not is_enabled():
+        return
+
+    key = _ROW_KEY[connection.vendor]
+    placeholders = ', '.join(['%s'] * len(card_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE {key} IN ({placeholders})", card_ids)
+        cursor.execute(f"{INDEX_SQL[connection.vendor]} WHERE c.id IN ({placeholders})", card_ids)
+
+
+def remove_cards(card_ids):
+    """Remove the given cards from the index."""
+    card_ids = list(card_ids)
+    if not card_ids or not is_enabled():
+        return
+
+    key = _ROW_KEY[connection.vendor]
+    placeholders = ', '.join(['%s'] * len(card_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE {key} IN ({placeholders})", card_ids)
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from the cards table.
+
+    Returns:
+        int: Number of cards indexed
+    """
+    if not is_enabled():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(INDEX_SQL[connection.vendor])
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+def _terms(query):
+    """Lower-cased word terms of a user query."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _match_sql(user, terms):
+    """
+    SQL selecting the ids of a user's cards containing every term, and its params.
+
+    Returns:
+        tuple: (sql, params), or None if the index can't serve the terms
+    """
+    if connection.vendor == 'sqlite':
+        indexed = [term for term in terms if len(term) >= MIN_INDEXED_TERM]
+        if not indexed:
+            return None
+
+        match = ' '.join(f'"{term}"' for term in indexed)
+        sql = f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s AND user_id = %s"
+        params = [match, user.pk]
+        for term in terms:
+            if len(term) < MIN_INDEXED_TERM:
+                sql += " AND instr(lower(ticker || ' ' || company_name || ' ' || notes || ' ' || tags), %s) > 0"
+                params.append(term)
+        return sql, params
+
+    tsquery = ' & '.join(f'{term}:*' for term in terms)
+    text = ' '.join(terms)
+    contains = ' AND '.join(['body ILIKE %s'] * len(terms))
+    sql = (
+        f"SELECT card_id FROM {TABLE}, to_tsquery('simple', %s) query "
+        f"WHERE user_id = %s AND (({contains}) OR body %% %s)"
+    )
+    patterns = ['%{}%'.format(term.replace('_', '\\_')) for term in terms]
+    return sql, [tsquery, user.pk, *patterns, text]
+
+
+def matching_cards(user, query):
+    """
+    All of a user's cards containing every term of ``query``.
+
+    Unlike search_cards() the result isn't ranked or limited, so it can be
+    used to filter a queryset, e.g. ``cards.filter(pk__in=matching_cards(...))``.
+
+    Returns:
+        RawSQL: Subquery of StockCard ids, or None if the index can't serve
+        the query (callers should filter with icontains instead)
+    """
+    terms = _terms(query)
+    if not terms or not is_enabled():
+        return None
+    match = _match_sql(user, terms)
+    return RawSQL(*match) if match else None
+
+
+def search_cards(user, query, limit=SEARCH_LIMIT):
+    """
+    Rank a user's cards containing every term of ``query``.
+
+    Only the best ``limit`` matches are returned; use matching_cards() to
+    find all of them.
+
+    Args:
+        user (User): Owner of the cards
+        query (str): Free-text search input
+        limit (int): Maximum number of results
+
+    Returns:
+        list: Matching StockCard ids, best match first
+    """
+    terms = _terms(query)
+    match = _match_sql(user, terms) if terms and is_enabled() else None
+    if not match:
+        return []
+
+    sql, params = match
+    if connection.vendor == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        sql += f" ORDER BY bm25({TABLE}, {weights}) LIMIT %s"
+    else:
+        sql += " ORDER BY ts_rank(document, query) + similarity(body, %s) DESC, card_id LIMIT %s"
+        params.append(params[-1])
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
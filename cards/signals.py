@@ -0,0 +1,97 @@
+"""
+Signal handlers keeping derived data in sync with the cards.
+
+The search index (cards.search) and the dashboard fragment cache versions
+(cards.fragments) are updated after the surrounding transaction commits,
+so a rolled-back write never reaches them and a fragment rendered from
+uncommitted data is never cached under a current version.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import fragments, search
+from .models import PriceSnapshot, SavedFilter, Stock, StockCard, Tag
+
+
+def _reindex_on_commit(card_ids):
+    card_ids = list(card_ids)
+    if card_ids:
+        transaction.on_commit(lambda: search.index_cards(card_ids))
+        transaction.on_commit(lambda: fragments.bump_versions('card', card_ids))
+
+
+def _bump_on_commit(scope, object_ids):
+    object_ids = list(object_ids)
+    transaction.on_commit(lambda: fragments.bump_versions(scope, object_ids))
+
+
+@receiver(post_save, sender=StockCard)
+def index_saved_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _reindex_on_commit([instance.pk])
+
+
+@receiver(post_delete, sender=StockCard)
+def unindex_deleted_card(sender, instance, **kwargs):
+    card_id = instance.pk
+    transaction.on_commit(lambda: search.remove_cards([card_id]))
+    _bump_on_commit('card', [card_id])
+
+
+@receiver(m2m_changed, sender=StockCard.tags.through)
+def index_retagged_cards(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            # Tag.stock_cards.clear(): remember the cards before the links go
+            instance._search_card_ids = list(instance.stock_cards.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        _reindex_on_commit([instance.pk])
+    elif action == 'post_clear':
+        _reindex_on_commit(getattr(instance, '_search_card_ids', []))
+    else:
+        _reindex_on_commit(pk_set or [])
+
+
+@receiver(post_save, sender=Stock)
+def index_stock_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        _reindex_on_commit(instance.cards.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+def index_renamed_tag_cards(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        _reindex_on_commit(instance.stock_cards.values_list('pk', flat=True))
+    _bump_on_commit('tags', [instance.user_id])
+
+
+@receiver(pre_delete, sender=Tag)
+def index_deleted_tag_cards(sender, instance, **kwargs):
+    # The tag's links are deleted without m2m_changed, so collect the cards now
+    _reindex_on_commit(instance.stock_cards.values_list('pk', flat=True))
+    _bump_on_commit('tags', [instance.user_id])
+
+
+@receiver(post_save, sender=SavedFilter)
+@receiver(post_delete, sender=SavedFilter)
+def invalidate_saved_filters(sender, instance, **kwargs):
+    _bump_on_commit('filters', [instance.user_id])
+
+
+@receiver(m2m_changed, sender=SavedFilter.tags.through)
+def invalidate_retagged_saved_filters(sender, instance, action, reverse, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        user_id = instance.user_id
+        _bump_on_commit('filters', [user_id])
+
+
+@receiver(post_save, sender=PriceSnapshot)
+@receiver(post_delete, sender=PriceSnapshot)
+def invalidate_priced_card(sender, instance, **kwargs):
+    _bump_on_commit('card', [instance.stock_card_id])
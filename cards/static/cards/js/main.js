@@ -13,3 +13,33 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+
+// Load further dashboard pages in place (the link still works without JS)
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('.load-more-btn');
+    if (!button) {
+        return;
+    }
+    event.preventDefault();
+
+    const container = button.closest('.load-more');
+    button.textContent = 'Loading...';
+
+    fetch(button.dataset.fragmentUrl, {
+        credentials: 'same-origin',
+        headers: {'X-Requested-With': 'XMLHttpRequest'}
+    })
+        .then(function(response) {
+            if (!response.ok) {
+                throw new Error('Failed to load cards: ' + response.status);
+            }
+            return response.text();
+        })
+        .then(function(html) {
+            container.insertAdjacentHTML('afterend', html);
+            container.remove();
+        })
+        .catch(function() {
+            window.location.href = button.href;
+        });
+});
@@ -1,3 +1,222 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from decimal import Decimal
+from itertools import product
+from unittest import skipUnless
 
-# Create your tests here.
+from . import search as card_search
+from .models import PriceBar, Stock, StockCard, StockPrice, Tag
+from .price_compaction import compact_daily_bars, compact_raw_prices, period_start
+from .price_refresh import save_stock_prices
+from .views import DASHBOARD_SORT_OPTIONS, _dashboard_paginator
+
+# Sorts whose index order the dashboard relies on ('relevance' only applies
+# to search results, which are matched by id)
+INDEXED_SORTS = [sort for sort in DASHBOARD_SORT_OPTIONS if sort != 'relevance']
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+class DashboardQueryPlanTests(TestCase):
+    """Every filter/sort combination of the active-card dashboard is read in index order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('plans', password='password')
+        cls.tag = Tag.objects.create(user=cls.user, name='Tech')
+        for i in range(30):
+            stock = Stock.objects.create(ticker=f'T{i:03d}', company_name=f'Company {i}')
+            card = StockCard.objects.create(
+                user=cls.user,
+                stock=stock,
+                priority=1 + i % 3,
+                is_archived=i % 5 == 0,
+                change_7d=None if i % 4 == 0 else i - 15,
+            )
+            if i % 2:
+                card.tags.add(cls.tag)
+
+    def paginator(self, sort, priority, archived, tag, search=''):
+        params = {'sort': sort, 'search': search}
+        if priority:
+            params['priority'] = priority
+        if archived:
+            params['archived'] = 'true'
+        if tag:
+            params['tag'] = self.tag.pk
+        request = RequestFactory().get('/dashboard/', params)
+        request.user = self.user
+        paginator, filters = _dashboard_paginator(request)
+        self.assertEqual(filters['current_sort'], sort)
+        return paginator
+
+    def assertIndexOrdered(self, queryset):
+        sql = str(queryset.query)
+        plan = queryset.explain()
+        self.assertNotIn('USE TEMP B-TREE', plan, f'{sql}\n{plan}')
+        self.assertNotIn('DISTINCT', sql, sql)
+        self.assertNotIn('DISTINCT', plan, plan)
+
+    def test_every_combination_uses_an_index(self):
+        for sort, priority, tag in product(INDEXED_SORTS, [None, '2'], [False, True]):
+            with self.subTest(sort=sort, priority=priority, tag=tag):
+                queryset = self.paginator(sort, priority, False, tag).page_queryset()
+                self.assertIndexOrdered(queryset)
+                self.assertIn('(user_id=? AND is_archived=?', queryset.explain())
+
+    def test_archived_cards_are_sorted_within_the_user(self):
+        # With archived cards shown no is_archived-led index gives the order,
+        # but only the user's cards are read and sorted
+        for sort, priority, tag in product(INDEXED_SORTS, [None, '2'], [False, True]):
+            with self.subTest(sort=sort, priority=priority, tag=tag):
+                queryset = self.paginator(sort, priority, True, tag).page_queryset()
+                plan = queryset.explain()
+                self.assertIn('SEARCH cards_stockcard USING INDEX', plan, plan)
+                self.assertIn('(user_id=?', plan, plan)
+                self.assertNotIn('DISTINCT', str(queryset.query))
+
+    def test_later_pages_seek_to_the_cursor(self):
+        for sort, priority, tag in product(INDEXED_SORTS, [None, '2'], [False, True]):
+            with self.subTest(sort=sort, priority=priority, tag=tag):
+                paginator = self.paginator(sort, priority, False, tag)
+                paginator.page_size = 3
+                cursor = paginator.page().next_cursor
+                self.assertIsNotNone(cursor)
+                queryset = paginator.page_queryset(cursor)
+                self.assertIndexOrdered(queryset)
+
+                # The index is searched from the cursor's sort key, not
+                # scanned from the start of the user's (or priority's) rows
+                plan = queryset.explain()
+                self.assertRegex(plan, r'SEARCH cards_stockcard USING INDEX \w+ \(user_id=\?( AND \w+=\?)* AND [^)]*[<>]\?\)')
+
+    def test_search_is_served_by_the_index(self):
+        if not card_search.is_enabled():
+            self.skipTest('SQLite without FTS5 trigram support')
+        for sort, search in product(DASHBOARD_SORT_OPTIONS, ['pany', 'company 1']):
+            with self.subTest(sort=sort, search=search):
+                queryset = self.paginator(sort, None, False, False, search).page_queryset()
+                sql = str(queryset.query)
+                plan = queryset.explain()
+                # Matches come from the search table's index, and the cards
+                # are fetched by id, never filtered with LIKE one by one
+                self.assertNotIn('LIKE', sql, sql)
+                self.assertIn('SCAN cards_search VIRTUAL TABLE INDEX', plan, plan)
+                self.assertNotIn('SCAN cards_stockcard', plan, plan)
+
+
+class SearchTests(TestCase):
+    """Dashboard search matches substrings of every term through the index."""
+
+    def setUp(self):
+        if not card_search.is_enabled():
+            self.skipTest('No search index on this database')
+        self.user = User.objects.create_user('searcher')
+        self.energy = StockCard.objects.create(
+            user=self.user, notes='Renewable energy, 2nd pick',
+            stock=Stock.objects.create(ticker='NEE', company_name='NextEra Energy'),
+        )
+        self.apple = StockCard.objects.create(
+            user=self.user, notes='Phones',
+            stock=Stock.objects.create(ticker='AAPL', company_name='Apple Inc.'),
+        )
+        card_search.rebuild_index()
+
+    def search(self, query):
+        request = RequestFactory().get('/dashboard/', {'search': query})
+        request.user = self.user
+        paginator, _ = _dashboard_paginator(request)
+        return [card.pk for card in paginator.page().items]
+
+    def test_terms_match_inside_words(self):
+        self.assertEqual(self.search('nergy'), [self.energy.pk])
+        self.assertEqual(self.search('newab xtera'), [self.energy.pk])
+        self.assertEqual(self.search('nergy phones'), [])
+
+    def test_short_terms_narrow_longer_ones(self):
+        self.assertEqual(self.search('energy 2n'), [self.energy.pk])
+        self.assertEqual(self.search('energy zz'), [])
+
+    def test_only_short_terms_fall_back_to_icontains(self):
+        self.assertEqual(self.search('pl'), [self.apple.pk])
+
+
+class SaveStockPricesTests(TestCase):
+    """Storing shared prices keeps every card's latest price in sync."""
+
+    def setUp(self):
+        self.stock = Stock.objects.create(ticker='AAPL', company_name='Apple Inc.')
+        self.first = StockCard.objects.create(user=User.objects.create_user('first'), stock=self.stock)
+        self.fetched_at = timezone.now() - timezone.timedelta(minutes=5)
+        save_stock_prices({self.stock.pk: {'price': Decimal('150.00'), 'volume': 1000, 'timestamp': self.fetched_at}})
+
+    def add_card(self):
+        return StockCard.objects.create(user=User.objects.create_user('second'), stock=self.stock)
+
+    @override_settings(PRICE_SKIP_UNCHANGED=True)
+    def test_new_card_gets_price_when_unchanged_price_is_skipped(self):
+        card = self.add_card()
+        data = {'price': Decimal('150.00'), 'volume': 1000, 'timestamp': timezone.now()}
+
+        self.assertEqual(save_stock_prices({self.stock.pk: data}), 0)
+        card.refresh_from_db()
+        self.assertEqual(card.last_price, Decimal('150.00'))
+        self.assertEqual(card.last_price_at, self.fetched_at)
+
+    def test_new_card_gets_price_when_fetched_price_is_not_newer(self):
+        card = self.add_card()
+        data = {'price': Decimal('140.00'), 'volume': 900, 'timestamp': self.fetched_at}
+
+        self.assertEqual(save_stock_prices({self.stock.pk: data}), 0)
+        card.refresh_from_db()
+        self.assertEqual(card.last_price, Decimal('150.00'))
+        self.assertEqual(StockPrice.objects.count(), 1)
+
+    @override_settings(PRICE_SKIP_UNCHANGED=True)
+    def test_unchanged_price_recomputes_stored_changes(self):
+        week_ago = timezone.now() - timezone.timedelta(days=8)
+        StockPrice.objects.create(stock=self.stock, price=Decimal('100.00'), timestamp=week_ago)
+        StockCard.objects.filter(pk=self.first.pk).update(change_7d=None)
+        data = {'price': Decimal('150.00'), 'volume': 1000, 'timestamp': timezone.now()}
+
+        self.assertEqual(save_stock_prices({self.stock.pk: data}), 0)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.change_7d, 50.0)
+
+
+class PriceCompactionTests(TestCase):
+    """Raw prices roll up into daily and weekly bars."""
+
+    def setUp(self):
+        self.stock = Stock.objects.create(ticker='MSFT', company_name='Microsoft')
+        # A Monday well past any retention, and the snapshots taken over it
+        # (volume is the day's running total at each snapshot)
+        self.day = period_start(timezone.now() - timezone.timedelta(days=60), 'week')
+        for hour, price, volume in [(10, '100.00', 1000), (12, '104.00', 2500), (15, '102.00', 4000)]:
+            StockPrice.objects.create(
+                stock=self.stock, price=Decimal(price), volume=volume,
+                timestamp=self.day + timezone.timedelta(hours=hour),
+            )
+
+    def test_daily_bar_keeps_the_days_total_volume(self):
+        summary = compact_raw_prices(timezone.now(), batch_size=2)
+
+        self.assertEqual(summary, {'rows': 3, 'bars': 2})
+        bar = PriceBar.objects.get(stock=self.stock, period='day')
+        self.assertEqual(bar.volume, 4000)
+        self.assertEqual((bar.open, bar.high, bar.low, bar.close), (
+            Decimal('100.00'), Decimal('104.00'), Decimal('100.00'), Decimal('102.00'),
+        ))
+
+    def test_weekly_bar_adds_up_daily_volumes(self):
+        StockPrice.objects.create(
+            stock=self.stock, price=Decimal('103.00'), volume=3000,
+            timestamp=self.day + timezone.timedelta(days=1, hours=11),
+        )
+        compact_raw_prices(timezone.now())
+        compact_daily_bars(timezone.now())
+
+        bar = PriceBar.objects.get(stock=self.stock)
+        self.assertEqual(bar.period, 'week')
+        self.assertEqual(bar.volume, 7000)
@@ -12,6 +12,7 @@ urlpatterns = [
 
     # Dashboard
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/cards/', views.dashboard_cards, name='dashboard_cards'),
 
     # Stock card management
     path('card/create/', views.card_create, name='card_create'),
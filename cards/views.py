@@ -1,16 +1,22 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponseBadRequest
+from django.urls import reverse
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
 from django.utils import timezone
 
-from .models import StockCard, Tag, SavedFilter, Stock, PriceSnapshot
+from .models import StockCard, Tag, Stock
 from .forms import (
     UserRegistrationForm, StockCardForm, TagForm,
     SavedFilterForm, ManualPriceForm
 )
+from . import fragments
+from . import search as card_search
+from .pagination import KeysetPaginator, InvalidCursor
 from .price_adapter import price_adapter
+from .price_refresh import refresh_stock, save_stock_prices
 
 
 def home(request):
@@ -38,68 +44,166 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 
-@login_required
-def dashboard(request):
-    """Main dashboard showing user's stock cards."""
+# Cards rendered per dashboard page (further pages load incrementally)
+DASHBOARD_PAGE_SIZE = 24
+
+# Dashboard orderings; each ends in a unique key so keyset pagination is stable
+DASHBOARD_SORT_OPTIONS = {
+    'priority': ['priority', '-updated_at', '-id'],
+    'updated_at': ['-updated_at', '-id'],
+    'created_at': ['-created_at', '-id'],
+    'ticker': ['stock_ticker', 'id'],
+    'movers': ['-mover', 'priority', '-id'],
+    'relevance': ['relevance', 'id'],
+}
+
+
+def _dashboard_paginator(request):
+    """
+    Filter and sort the user's cards from the dashboard query string.
+
+    Returns:
+        tuple: (KeysetPaginator, dict of the current filter values)
+    """
     # Get filter parameters
     priority_filter = request.GET.get('priority')
     tag_filter = request.GET.get('tag')
     show_archived = request.GET.get('archived') == 'true'
-    sort_by = request.GET.get('sort', 'priority')
+    sort_by = request.GET.get('sort', '')
     search = request.GET.get('search', '').strip()
 
-    # Base queryset
-    cards = StockCard.objects.filter(user=request.user)
+    # Base queryset (stock is loaded up front and tags only for cards whose
+    # cached fragment is stale, see cards.fragments; prices and changes
+    # come from the denormalized fields)
+    cards = StockCard.objects.filter(user=request.user).select_related('stock')
 
     # Apply filters
     if not show_archived:
-        cards = cards.filter(is_archived=False)
+        cards = cards.active()
 
     if priority_filter:
         cards = cards.filter(priority=priority_filter)
 
+    # Tag filters are EXISTS probes rather than joins, so the cards are
+    # still read in index order and can't be duplicated (no DISTINCT)
+    card_tags = StockCard.tags.through.objects.filter(stockcard_id=OuterRef('pk'))
     if tag_filter:
-        cards = cards.filter(tags__id=tag_filter)
-
-    if search:
+        cards = cards.filter(Exists(card_tags.filter(tag_id=tag_filter)))
+
+    # Search through the substring index where the database has one. Every
+    # match is kept (so pagination reaches all of them); only the best
+    # SEARCH_LIMIT are ranked for "Best Match".
+    matches = None
+    indexed = card_search.matching_cards(request.user, search) if search else None
+    if indexed is not None:
+        cards = cards.filter(pk__in=indexed)
+        matches = card_search.search_cards(request.user, search)
+    elif search:
         cards = cards.filter(
             Q(stock__ticker__icontains=search) |
             Q(stock__company_name__icontains=search) |
-            Q(notes__icontains=search)
+            Q(notes__icontains=search) |
+            Q(Exists(card_tags.filter(tag__name__icontains=search)))
         )
 
-    # Apply sorting
-    sort_options = {
-        'priority': ['priority', '-updated_at'],
-        'updated_at': ['-updated_at'],
-        'created_at': ['-created_at'],
-        'ticker': ['stock__ticker'],
+    # Apply sorting (cards without a 7-day change sort last among movers;
+    # search results default to best match first)
+    if matches is not None and sort_by in ('', 'relevance'):
+        sort_by = 'relevance'
+        cards = cards.annotate(relevance=Case(
+            *[When(pk=card_id, then=Value(rank)) for rank, card_id in enumerate(matches)],
+            default=Value(len(matches)),
+        ))
+    elif sort_by not in DASHBOARD_SORT_OPTIONS or sort_by == 'relevance':
+        sort_by = 'priority'
+    if sort_by == 'movers':
+        cards = cards.with_mover()
+
+    # Priority is constant under the priority filter; leaving it out of the
+    # ordering lets a cursor seek on the next key of the index
+    ordering = [key for key in DASHBOARD_SORT_OPTIONS[sort_by] if not (priority_filter and key == 'priority')]
+    paginator = KeysetPaginator(cards, ordering, page_size=DASHBOARD_PAGE_SIZE)
+
+    filters = {
+        'current_priority': priority_filter,
+        'current_tag': tag_filter,
+        'show_archived': show_archived,
+        'current_sort': sort_by,
+        'search_query': search,
     }
-    cards = cards.order_by(*sort_options.get(sort_by, ['priority', '-updated_at']))
+    return paginator, filters
+
+
+def _dashboard_page(request):
+    """
+    Filter, sort and paginate the user's cards from the dashboard query string.
 
-    # Get distinct cards (in case tag filter created duplicates)
-    cards = cards.distinct()
+    Returns:
+        tuple: (KeysetPage, dict of the current filter values)
 
-    # Get user's tags for filter dropdown
-    user_tags = Tag.objects.filter(user=request.user)
+    Raises:
+        InvalidCursor: If the ``cursor`` parameter is invalid
+    """
+    paginator, filters = _dashboard_paginator(request)
+    return paginator.page(request.GET.get('cursor')), filters
 
-    # Get saved filters
-    saved_filters = SavedFilter.objects.filter(user=request.user)
+
+def _next_page_urls(request, page):
+    """Full-page and fragment URLs for the page after ``page``, or (None, None)."""
+    if not page.has_next:
+        return None, None
+
+    params = request.GET.copy()
+    params['cursor'] = page.next_cursor
+    query = params.urlencode()
+    return f"{reverse('dashboard')}?{query}", f"{reverse('dashboard_cards')}?{query}"
+
+
+@login_required
+def dashboard(request):
+    """Main dashboard showing the first page of the user's stock cards."""
+    try:
+        page, filters = _dashboard_page(request)
+    except InvalidCursor:
+        return redirect('dashboard')
+
+    next_url, next_fragment_url = _next_page_urls(request, page)
+
+    # Get user's tags for filter dropdown and saved filters (cached per user)
+    user_tags = fragments.user_tags(request.user)
+    saved_filters = fragments.user_saved_filters(request.user)
 
     context = {
-        'cards': cards,
+        'page': page,
+        'card_fragments': fragments.render_cards(page.items, request.user),
+        'next_url': next_url,
+        'next_fragment_url': next_fragment_url,
         'user_tags': user_tags,
         'saved_filters': saved_filters,
-        'current_priority': priority_filter,
-        'current_tag': tag_filter,
-        'show_archived': show_archived,
-        'current_sort': sort_by,
-        'search_query': search,
+        **filters,
     }
 
     return render(request, 'cards/dashboard.html', context)
 
 
+@login_required
+def dashboard_cards(request):
+    """Fragment with the next page of dashboard cards, for incremental loading."""
+    try:
+        page, _ = _dashboard_page(request)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+
+    next_url, next_fragment_url = _next_page_urls(request, page)
+
+    return render(request, 'cards/partials/card_page.html', {
+        'page': page,
+        'card_fragments': fragments.render_cards(page.items, request.user),
+        'next_url': next_url,
+        'next_fragment_url': next_fragment_url,
+    })
+
+
 @login_required
 def card_create(request):
     """Create a new stock card."""
@@ -108,17 +212,13 @@ def card_create(request):
         if form.is_valid():
             card = form.save()
 
-            # Fetch and save initial price
+            # Fetch and save initial price (never a stale cached one, which
+            # would be stored as a fresh StockPrice row)
             ticker = card.stock.ticker
-            price_data = price_adapter.get_stock_price(ticker)
+            price_data = price_adapter.get_stock_price(ticker, allow_stale=False)
 
             if price_data:
-                PriceSnapshot.objects.create(
-                    stock_card=card,
-                    price=price_data['price'],
-                    volume=price_data.get('volume', 0),
-                    source='api'
-                )
+                save_stock_prices({card.stock_id: price_data})
                 messages.success(
                     request,
                     f'Stock card for {ticker} created successfully! Current price: ${price_data["price"]}'
@@ -165,15 +265,19 @@ def card_edit(request, card_id):
 @login_required
 def card_detail(request, card_id):
     """View detailed information about a stock card."""
-    card = get_object_or_404(StockCard, id=card_id, user=request.user)
+    card = get_object_or_404(
+        StockCard.objects.select_related('stock').with_price_changes(7, 30),
+        id=card_id,
+        user=request.user
+    )
 
-    # Get price history (last 30 snapshots)
-    price_history = card.price_snapshots.all()[:30]
+    # Get price history (last 30 shared and manual prices)
+    price_history = card.get_price_history(limit=30)
 
     # Get latest price
     latest_price = card.get_latest_price()
 
-    # Calculate price changes
+    # Price changes (annotated by with_price_changes)
     price_change_7d = card.get_price_change_percentage(days=7)
     price_change_30d = card.get_price_change_percentage(days=30)
 
@@ -220,15 +324,10 @@ def refresh_price(request, card_id):
     """Refresh stock price for a card."""
     card = get_object_or_404(StockCard, id=card_id, user=request.user)
 
-    price_data = price_adapter.get_stock_price(card.stock.ticker)
+    # Refresh the stock once for every card watching it
+    price_data = refresh_stock(card.stock)
 
     if price_data:
-        PriceSnapshot.objects.create(
-            stock_card=card,
-            price=price_data['price'],
-            volume=price_data.get('volume', 0),
-            source='api'
-        )
         messages.success(request, f'Price updated: ${price_data["price"]}')
     else:
         messages.error(request, 'Failed to fetch price. Try manual entry.')
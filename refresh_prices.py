@@ -1,50 +1,97 @@
 #!/usr/bin/env python3
 """
 Refresh stock prices for all existing cards.
+
+Each distinct stock is fetched once and its price is stored once in the
+shared price series read by every card watching it.
+
+Usage:
+    python3 refresh_prices.py                          # serial (batched) refresh
+    python3 refresh_prices.py --workers 8 --timeout 20 # concurrent refresh
 """
 
 import os
+import argparse
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appserver.settings')
 django.setup()
 
-from cards.models import StockCard, PriceSnapshot
 from cards.price_adapter import price_adapter
+from cards.price_refresh import refresh_stocks, BATCH_SIZE
+
+
+def refresh_all_prices(workers=1, timeout=30, batch_size=BATCH_SIZE):
+    """
+    Refresh every watched stock and print progress and a summary.
+
+    Args:
+        workers (int): Maximum number of concurrent fetches (1 = serial)
+        timeout (float): Per-ticker timeout in seconds for concurrent refresh
+        batch_size (int): Stocks fetched and written per batch
+    """
+    if workers > 1:
+        print(f"Refreshing prices for all stocks ({workers} workers, {timeout}s timeout)...")
+    else:
+        print("Refreshing prices for all stocks...")
 
-def refresh_all_prices():
-    print("Refreshing prices for all stock cards...")
-
-    cards = StockCard.objects.all()
-    success_count = 0
-    fail_count = 0
-
-    for card in cards:
-        ticker = card.stock.ticker
-        print(f"\nFetching price for {ticker}...", end=" ")
-
-        price_data = price_adapter.get_stock_price(ticker)
-
-        if price_data:
-            # Create new price snapshot
-            PriceSnapshot.objects.create(
-                stock_card=card,
-                price=price_data['price'],
-                volume=price_data.get('volume', 0),
-                source='api'
-            )
-            print(f"✓ ${price_data['price']}")
-            success_count += 1
-        else:
-            print(f"✗ Failed")
-            fail_count += 1
+    done = 0
+    status_labels = {'ok': '✓', 'failed': '✗ Failed', 'timeout': '✗ Timed out'}
+
+    def progress(ticker, status):
+        nonlocal done
+        done += 1
+        print(f"[{done}] {ticker} {status_labels[status]}")
+
+    summary = refresh_stocks(
+        workers=workers,
+        timeout=timeout,
+        batch_size=batch_size,
+        progress=progress,
+    )
+
+    elapsed = summary['elapsed']
+    rate = summary['stocks'] / elapsed if elapsed > 0 else 0
 
     print("\n" + "="*60)
     print(f"Refresh complete!")
-    print(f"  Successful: {success_count}")
-    print(f"  Failed: {fail_count}")
+    print(f"  Stocks: {summary['stocks']}")
+    print(f"  Successful: {len(summary['succeeded'])}")
+    print(f"  Failed: {len(summary['failed'])}")
+    if summary['timed_out']:
+        print(f"  Timed out: {len(summary['timed_out'])}")
+    print(f"  Prices written: {summary['prices']}")
+    print(f"  Elapsed: {elapsed:.1f}s ({rate:.1f} stocks/sec)")
+    print("\nPrice methods (current order):")
+    for stats in price_adapter.get_method_stats():
+        state = " [circuit open]" if stats['circuit_open'] else ""
+        print(
+            f"  {stats['method']:<14} {stats['successes']} ok / {stats['failures']} failed, "
+            f"avg {stats['avg_latency']:.2f}s{state}"
+        )
     print("="*60)
 
+
 if __name__ == "__main__":
-    refresh_all_prices()
+    parser = argparse.ArgumentParser(description="Refresh stock prices for all existing cards.")
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of concurrent fetches (1 = serial, batched refresh)',
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=30,
+        help='Per-ticker timeout in seconds for concurrent refresh',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=BATCH_SIZE,
+        help='Number of stocks fetched and written per batch',
+    )
+    args = parser.parse_args()
 
+    refresh_all_prices(workers=args.workers, timeout=args.timeout, batch_size=args.batch_size)
@@ -11,8 +11,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appserver.settings')
 django.setup()
 
 from django.contrib.auth.models import User
-from cards.models import Stock, StockCard, Tag, PriceSnapshot
+from cards.models import Stock, StockCard, Tag
 from cards.price_adapter import price_adapter
+from cards.price_refresh import save_stock_prices
 from decimal import Decimal
 
 def setup_test_data():
@@ -77,7 +78,7 @@ def setup_test_data():
             continue
 
         # Fetch stock info
-        price_data = price_adapter.get_stock_price(ticker)
+        price_data = price_adapter.get_stock_price(ticker, allow_stale=False)
 
         if price_data:
             # Update stock info
@@ -97,13 +98,8 @@ def setup_test_data():
             # Add tags
             card.tags.add(tags[0])  # Add Tech tag
 
-            # Create price snapshot
-            PriceSnapshot.objects.create(
-                stock_card=card,
-                price=price_data['price'],
-                volume=price_data.get('volume', 0),
-                source='api'
-            )
+            # Store the price in the stock's shared series
+            save_stock_prices({stock.id: price_data})
 
             print(f"✓ Created card for {ticker} - ${price_data['price']}")
         else: